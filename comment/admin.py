@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 from comment.models import (
-    Comment, Flag, FlagInstance, Reaction, ReactionInstance, Follower, BlockedUser, BlockedUserHistory
+    Comment, Flag, FlagInstance, Reaction, ReactionInstance, Follower, BlockedUser, BlockedUserHistory, CommentCounter,
+    OutboxEmail
 )
 
 
@@ -57,9 +58,22 @@ class BlockedUserHistoryModelAdmin(admin.ModelAdmin):
     )
 
 
+class CommentCounterModelAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'content_object', 'comment_count', 'flagged_count')
+    readonly_fields = list_display
+
+
+class OutboxEmailModelAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'comment', 'created', 'attempts', 'next_attempt')
+    readonly_fields = ('kind', 'comment', 'confirmation_key', 'api', 'host', 'receiver', 'created', 'last_error')
+    list_filter = ('kind',)
+
+
 admin.site.register(Comment, CommentModelAdmin)
 admin.site.register(Reaction, ReactionModelAdmin)
 admin.site.register(Flag, FlagModelAdmin)
 admin.site.register(Follower, FollowerModelAdmin)
 admin.site.register(BlockedUser, BlockedUserModelAdmin)
 admin.site.register(BlockedUserHistory, BlockedUserHistoryModelAdmin)
+admin.site.register(CommentCounter, CommentCounterModelAdmin)
+admin.site.register(OutboxEmail, OutboxEmailModelAdmin)
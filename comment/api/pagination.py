@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+from comment.conf import settings
+
+
+class CommentCursorPagination(CursorPagination):
+    """
+    Keyset pagination of parent comments on `(posted, id)`, the cost of a page does not depend on its depth.
+    Pagination is disabled unless `COMMENT_API_PAGE_SIZE` is set.
+    """
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        return settings.COMMENT_API_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if list(settings.COMMENT_ORDER_BY)[:1] == ['posted']:
+            return 'posted', 'id'
+        return '-posted', '-id'
@@ -21,6 +21,13 @@ def get_profile_model():
     return apps.get_model(profile_app_name, profile_model_name)
 
 
+def get_related_instances(obj, related_name):
+    """Use the instances prefetched by the list view, otherwise fetch them along with their users"""
+    if related_name in getattr(obj, '_prefetched_objects_cache', {}):
+        return getattr(obj, related_name).all()
+    return getattr(obj, related_name).all().select_related('user')
+
+
 def get_user_fields():
     user_model = get_user_model()
     fields = user_model._meta.get_fields()
@@ -62,22 +69,19 @@ class BaseCommentSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_parent(obj):
-        if obj.parent:
-            return obj.parent.id
-        else:
-            return None
+        return obj.parent_id
 
     @staticmethod
     def get_replies(obj):
         if obj.is_parent:
-            return CommentSerializer(obj.replies(), many=True).data
+            return CommentSerializer(obj.get_replies(), many=True).data
         else:
             return []
 
     @staticmethod
     def get_reply_count(obj):
         if obj.is_parent:
-            return obj.replies().count()
+            return obj.get_replies_count()
         else:
             return 0
 
@@ -161,7 +165,7 @@ class ReactionSerializer(serializers.ModelSerializer):
     @staticmethod
     def get_users(obj):
         users = {'likes': [], 'dislikes': []}
-        for instance in obj.reactions.all().select_related('user'):
+        for instance in get_related_instances(obj, 'reactions'):
             user_info = {
                 'id': instance.user.id,
                 'username': instance.user.USERNAME_FIELD
@@ -189,7 +193,7 @@ class FlagSerializer(serializers.ModelSerializer):
                 'id': flag_instance.user.id,
                 'username': flag_instance.user.USERNAME_FIELD
             }
-            for flag_instance in obj.flags.all().select_related('user')
+            for flag_instance in get_related_instances(obj, 'flags')
         ]
 
     @staticmethod
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from comment.validators import ValidatorMixin, ContentTypeValidator
+from comment.api.pagination import CommentCursorPagination
 from comment.api.serializers import CommentSerializer, CommentCreateSerializer
 from comment.api.permissions import (
     IsOwnerOrReadOnly, FlagEnabledPermission, CanChangeFlaggedCommentState, SubscriptionEnabled,
@@ -32,24 +33,29 @@ class CommentCreate(ValidatorMixin, generics.CreateAPIView):
 class CommentList(ContentTypeValidator, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+    pagination_class = CommentCursorPagination
     api = True
 
     def get_queryset(self):
         self.validate(self.request)
-        return Comment.objects.filter_parents_by_object(self.model_obj).select_related('user', 'reaction', 'flag')
+        return Comment.objects.filter_parents_with_replies_and_reactions(self.model_obj)
 
 
 class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Comment.objects.all().select_related('user', 'reaction', 'flag')
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly, UserPermittedOrReadOnly)
 
+    def get_queryset(self):
+        return Comment.objects.all_with_related()
+
 
 class CommentDetailForReaction(generics.UpdateAPIView):
-    queryset = Comment.objects.all().select_related('user', 'reaction', 'flag')
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, UserPermittedOrReadOnly)
 
+    def get_queryset(self):
+        return Comment.objects.all_with_related()
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['reaction_update'] = True
@@ -68,16 +74,17 @@ class CommentDetailForReaction(generics.UpdateAPIView):
         except ValidationError as e:
             return Response({'detail': e.messages}, status=status.HTTP_400_BAD_REQUEST)
 
-        comment.reaction.refresh_from_db()
         serializer = self.get_serializer(comment)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class CommentDetailForFlag(generics.UpdateAPIView):
-    queryset = Comment.objects.all().select_related('user', 'reaction', 'flag')
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, FlagEnabledPermission, UserPermittedOrReadOnly)
 
+    def get_queryset(self):
+        return Comment.objects.all_with_related()
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['flag_update'] = True
@@ -98,10 +105,12 @@ class CommentDetailForFlag(generics.UpdateAPIView):
 
 
 class CommentDetailForFlagStateChange(generics.UpdateAPIView):
-    queryset = Comment.objects.all().select_related('user', 'reaction', 'flag')
     serializer_class = CommentSerializer
     permission_classes = (CanChangeFlaggedCommentState, UserPermittedOrReadOnly)
 
+    def get_queryset(self):
+        return Comment.objects.all_with_related()
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['flag_update'] = True
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as _
+from django.core.signals import setting_changed
 from django.db.models import signals
 from django.core.checks import register, Tags
 
@@ -11,9 +12,13 @@ class CommentConfig(AppConfig):
     def ready(self):
         import comment.signals
         import comment.checks
+        import comment.utils
 
         signals.post_migrate.connect(comment.signals.create_permission_groups, sender=self)
         signals.post_migrate.connect(comment.signals.adjust_flagged_comments, sender=self)
+        setting_changed.connect(comment.signals.reset_profile_cache)
+        # introspect the profile model once instead of for every request
+        comment.utils.get_profile_info()
 
         register(comment.checks.check_orders_unique, Tags.compatibility)
         register(comment.checks.check_order_values, Tags.compatibility)
@@ -17,12 +17,30 @@ COMMENT_FLAG_REASONS = [
 COMMENT_URL_PREFIX = 'comment-'
 COMMENT_URL_SUFFIX = ''
 COMMENT_URL_ID_LENGTH = 8
+COMMENT_URL_ID_GENERATOR = 'random'
+COMMENT_URL_ID_MAX_ATTEMPTS = 5
 COMMENT_PER_PAGE = 10
+COMMENT_USE_CURSOR_PAGINATION = False
+COMMENT_API_PAGE_SIZE = None
+COMMENT_LAZY_LOAD_REPLIES = False
 
 COMMENT_ALLOW_ANONYMOUS = False
 COMMENT_FROM_EMAIL = getattr(settings, 'EMAIL_HOST_USER', None)   # used for sending confirmation emails
 COMMENT_CONTACT_EMAIL = COMMENT_FROM_EMAIL  # used for contact address in confirmation emails
 COMMENT_SEND_HTML_EMAIL = True
+COMMENT_EMAIL_SYNC_DELIVERY = False
+COMMENT_EMAIL_WORKERS = 2
+COMMENT_EMAIL_QUEUE_SIZE = 1000
+COMMENT_EMAIL_QUEUE_FULL_POLICY = 'block'  # or 'drop'
+COMMENT_EMAIL_BATCH_SIZE = 50
+COMMENT_EMAIL_CONNECTION_IDLE_TIMEOUT = 30
+COMMENT_FOLLOWERS_CHUNK_SIZE = 500
+COMMENT_EMAIL_USE_OUTBOX = False
+COMMENT_OUTBOX_BATCH_SIZE = 100
+COMMENT_OUTBOX_MAX_ATTEMPTS = 5
+COMMENT_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+COMMENT_NOTIFICATION_DIGEST = False
+COMMENT_NOTIFICATION_DIGEST_INTERVAL = 3600  # seconds
 COMMENT_ANONYMOUS_USERNAME = 'Anonymous User'
 COMMENT_USE_EMAIL_FIRST_PART_AS_USERNAME = False
 
@@ -40,6 +58,12 @@ COMMENT_ALLOW_BLOCKING_USERS = False
 COMMENT_ALLOW_MODERATOR_TO_BLOCK = False
 COMMENT_RESPONSE_FOR_BLOCKED_USER = 'You cannot perform this action at the moment! Contact the admin for more details'
 
+COMMENT_CACHE_ALIAS = 'default'
+COMMENT_BLOCKED_USERS_CACHE_TIMEOUT = 0
+COMMENT_CACHE_RENDERED_CONTENT = False
+COMMENT_RENDERED_CONTENT_CACHE_TIMEOUT = 3600
+COMMENT_CONTENT_OBJECT_CACHE_TIMEOUT = 0
+
 COMMENT_ALLOW_MARKDOWN = False
 COMMENT_MARKDOWN_EXTENSIONS = ['markdown.extensions.fenced_code']
 COMMENT_MARKDOWN_EXTENSION_CONFIG = {}
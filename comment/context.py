@@ -1,8 +1,14 @@
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured
 
 from comment.conf import settings
 from comment.messages import ErrorMessage
-from comment.utils import get_request_data, is_comment_moderator, paginate_comments, get_model_obj, has_valid_profile
+from comment.models import BlockedUser, FlagInstance, Follower, ReactionInstance
+from comment.pagination import paginate_comments_by_cursor
+from comment.utils import (
+    get_request_data, is_comment_moderator, paginate_comments, get_model_obj, has_valid_profile, can_block_user,
+    set_user_state
+)
 
 
 class DABContext(dict):
@@ -32,23 +38,79 @@ class DABContext(dict):
         return False
 
     def get_comments(self):
-        comments = self.model_object.comments.filter_parents_by_object(
-            self.model_object, include_flagged=is_comment_moderator(self.request.user)
-        )
-        page = get_request_data(self.request, 'page')
+        include_flagged = is_comment_moderator(self.request.user)
+        if settings.COMMENT_LAZY_LOAD_REPLIES:
+            comments = self.model_object.comments.filter_parents_without_replies(
+                self.model_object, include_flagged=include_flagged
+            )
+        else:
+            comments = self.model_object.comments.filter_parents_with_replies(
+                self.model_object, include_flagged=include_flagged
+            )
         comments_per_page = settings.COMMENT_PER_PAGE
-        if comments_per_page:
+        if comments_per_page and settings.COMMENT_USE_CURSOR_PAGINATION:
+            cursor = get_request_data(self.request, 'cursor')
+            comments = paginate_comments_by_cursor(comments, comments_per_page, cursor)
+        elif comments_per_page:
+            page = get_request_data(self.request, 'page')
             comments = paginate_comments(comments, comments_per_page, page)
         return comments
 
+    def _get_thread(self, comments):
+        """The listed comments followed by their replies, unless the replies are loaded on demand"""
+        if settings.COMMENT_LAZY_LOAD_REPLIES:
+            return list(comments)
+        include_flagged = is_comment_moderator(self.request.user)
+        thread = []
+        for comment in comments:
+            thread.append(comment)
+            thread.extend(comment.get_replies(include_flagged=include_flagged))
+        return thread
+
+    def get_blocked_status(self, comments):
+        """Blocking states of the authors of the listed comments and their replies, only needed by blockers"""
+        if not can_block_user(self.request.user):
+            return {}
+        return BlockedUser.objects.blocked_status_for(self._get_thread(comments))
+
+    def attach_user_state(self, comments):
+        """
+        Attach the reactions, flags and follows of the user on the listed comments, their replies and the model object
+        to these objects, fetching each of them in one query, for the `has_reacted`, `has_flagged` and `has_followed`
+        template tags.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return
+        thread = self._get_thread(comments)
+        reaction_types = ReactionInstance.objects.get_reaction_types_for_user(user, thread)
+        flagged_ids = None
+        if settings.COMMENT_FLAGS_ALLOWED:
+            flagged_ids = FlagInstance.objects.get_flagged_comment_ids(user, thread)
+        for comment in thread:
+            set_user_state(comment, user, reaction=reaction_types.get(comment.id))
+            if flagged_ids is not None:
+                set_user_state(comment, user, flagged=comment.id in flagged_ids)
+
+        if settings.COMMENT_ALLOW_SUBSCRIPTION:
+            # follow buttons are shown for the model object and every parent comment
+            followable = [self.model_object, *comments]
+            followed = Follower.objects.get_followed_objects(user.email, followable)
+            for model_object in followable:
+                content_type = ContentType.objects.get_for_model(model_object)
+                set_user_state(model_object, user, followed=(content_type.id, model_object.id) in followed)
+
     def __call__(self):
+        comments = self.get_comments()
+        self.attach_user_state(comments)
         return {
             'model_object': self.model_object,
             'model_name': self.model_name,
             'model_id': self.model_id,
             'app_name': self.app_name,
             'user': self.request.user,
-            'comments': self.get_comments(),
+            'comments': comments,
+            'blocked_status': self.get_blocked_status(comments),
             'login_url': self.get_login_url(),
             'has_valid_profile': has_valid_profile(),
             'allowed_flags': settings.COMMENT_FLAGS_ALLOWED,
@@ -58,4 +120,19 @@ class DABContext(dict):
             'is_blocking_allowed': settings.COMMENT_ALLOW_BLOCKING_USERS,
             'oauth': self.is_oauth(),
             'render_markdown': settings.COMMENT_ALLOW_MARKDOWN,
+            'lazy_replies': settings.COMMENT_LAZY_LOAD_REPLIES,
         }
+
+
+class RepliesContext(DABContext):
+    """Context for rendering the replies of a single parent comment that are loaded on demand"""
+    def __init__(self, request, parent, **kwargs):
+        self.parent = parent
+        super().__init__(request, model_object=parent.content_object, **kwargs)
+
+    def get_comments(self):
+        return [self.parent]
+
+    def _get_thread(self, comments):
+        include_flagged = is_comment_moderator(self.request.user)
+        return [self.parent, *self.parent.get_replies(include_flagged=include_flagged)]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from comment.models import Comment, CommentCounter
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored reply counts and the comment counts of every object from the comments table"
+
+    def handle(self, *args, **options):
+        Comment.objects.rebuild_reply_counts()
+        CommentCounter.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Comment counts rebuilt for {CommentCounter.objects.count()} objects.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from comment.models import Flag
+
+
+class Command(BaseCommand):
+    help = "Set the state of every flag according to COMMENT_FLAGS_ALLOWED, as done after each migration"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the flags whose state would change'
+        )
+
+    def handle(self, *args, **options):
+        flagged, unflagged = Flag.objects.refresh_states(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{flagged} flags would be flagged, {unflagged} would be unflagged.')
+            return
+        self.stdout.write(self.style.SUCCESS(f'{flagged} flags flagged, {unflagged} unflagged.'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from comment.conf import settings
+from comment.service.digest import send_comment_digests
+
+
+class Command(BaseCommand):
+    help = "Notify the followers about the comments posted since the last digest, see COMMENT_NOTIFICATION_DIGEST"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep sending a digest every interval instead of sending one and exiting'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.COMMENT_NOTIFICATION_DIGEST_INTERVAL,
+            help='No. of seconds between two digests, used with --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = send_comment_digests()
+            self.stdout.write(self.style.SUCCESS(f'Digest sent for {count} comments.'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from comment.conf import settings
+from comment.service.outbox import send_outbox_emails
+
+
+class Command(BaseCommand):
+    help = "Send the emails stored in the outbox when COMMENT_EMAIL_USE_OUTBOX is enabled"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.COMMENT_OUTBOX_BATCH_SIZE,
+            help='No. of emails sent in a transaction over a single mail connection'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep waiting for new emails instead of exiting once the outbox is empty'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='No. of seconds to wait before checking an empty outbox again, used with --loop'
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_outbox_emails(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent + failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total_sent} emails sent, {total_failed} failed.'))
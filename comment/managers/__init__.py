@@ -3,6 +3,8 @@ from comment.managers.reactions import ReactionManager, ReactionInstanceManager
 from comment.managers.flags import FlagManager, FlagInstanceManager
 from comment.managers.blocker import BlockedUserManager, BlockedUserHistoryManager
 from comment.managers.followers import FollowerManager
+from comment.managers.counters import CommentCounterManager
+from comment.managers.outbox import OutboxEmailManager
 
 
 __all__ = (
@@ -14,4 +16,6 @@ __all__ = (
     'BlockedUserManager',
     'BlockedUserHistoryManager',
     'FollowerManager',
+    'CommentCounterManager',
+    'OutboxEmailManager',
 )
@@ -1,9 +1,50 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
 from django.db import models
 
 from comment.conf import settings
 
 
 class BlockedUserManager(models.Manager):
+    """
+    When `COMMENT_BLOCKED_USERS_CACHE_TIMEOUT` is set, blocking states are cached per user id and per email in the cache
+    configured by `COMMENT_CACHE_ALIAS`, the cache backend bounds the memory used. All cached states are dropped
+    whenever a `BlockedUser` is saved or deleted, this only reaches other processes when the cache backend is shared.
+    """
+    cache_key_prefix = 'comment:blocked'
+
+    @staticmethod
+    def _get_cache():
+        return caches[settings.COMMENT_CACHE_ALIAS]
+
+    def _get_cache_generation(self):
+        return self._get_cache().get_or_set(self.cache_key_prefix + ':generation', uuid.uuid4().hex, None)
+
+    def invalidate_cache(self):
+        self._get_cache().set(self.cache_key_prefix + ':generation', uuid.uuid4().hex, None)
+
+    def _get_cache_key(self, generation, user_id=None, email=None):
+        if user_id:
+            return '{}:{}:user:{}'.format(self.cache_key_prefix, generation, user_id)
+        return '{}:{}:email:{}'.format(self.cache_key_prefix, generation, hashlib.md5(email.encode()).hexdigest())
+
+    @staticmethod
+    def _is_cache_enabled():
+        return bool(settings.COMMENT_BLOCKED_USERS_CACHE_TIMEOUT)
+
+    def _get_cached_state(self, lookup, **identity):
+        if not self._is_cache_enabled():
+            return self.filter(blocked=True, **lookup).exists()
+        cache = self._get_cache()
+        key = self._get_cache_key(self._get_cache_generation(), **identity)
+        blocked = cache.get(key)
+        if blocked is None:
+            blocked = self.filter(blocked=True, **lookup).exists()
+            cache.set(key, blocked, settings.COMMENT_BLOCKED_USERS_CACHE_TIMEOUT)
+        return blocked
+
     def is_user_blocked(self, user_id=None, email=None):
         if not settings.COMMENT_ALLOW_BLOCKING_USERS:
             return False
@@ -15,14 +56,65 @@ class BlockedUserManager(models.Manager):
 
     def _is_user_blocked_by_id(self, user_id):
         try:
-            return self.filter(user_id=int(user_id), blocked=True).exists()
+            user_id = int(user_id)
         except (ValueError, TypeError):
             return False
+        return self._get_cached_state({'user_id': user_id}, user_id=user_id)
 
     def _is_user_blocked_by_email(self, email):
         if not email:
             return False
-        return self.filter(email=email, blocked=True).exists()
+        return self._get_cached_state({'email': email}, email=email)
+
+    def blocked_status_for(self, comments):
+        """
+        Return a dict mapping the id of each comment to whether its author is blocked.
+        States missing from the cache, or all of them when the cache is disabled, are fetched in a single query.
+        """
+        identities = {
+            comment.id: {'user_id': comment.user_id} if comment.user_id else {'email': comment.email}
+            for comment in comments
+        }
+        if not settings.COMMENT_ALLOW_BLOCKING_USERS:
+            return {comment_id: False for comment_id in identities}
+
+        if not self._is_cache_enabled():
+            return self._fetch_blocked_states(identities)
+
+        cache = self._get_cache()
+        generation = self._get_cache_generation()
+        keys = {
+            comment_id: self._get_cache_key(generation, **identity)
+            for comment_id, identity in identities.items() if any(identity.values())
+        }
+        cached = cache.get_many(set(keys.values()))
+        missing = {comment_id: identities[comment_id] for comment_id, key in keys.items() if key not in cached}
+        if missing:
+            fetched = self._fetch_blocked_states(missing)
+            cache.set_many(
+                {keys[comment_id]: blocked for comment_id, blocked in fetched.items()},
+                settings.COMMENT_BLOCKED_USERS_CACHE_TIMEOUT
+            )
+            cached.update({keys[comment_id]: blocked for comment_id, blocked in fetched.items()})
+
+        return {comment_id: cached.get(keys.get(comment_id), False) for comment_id in identities}
+
+    def _fetch_blocked_states(self, identities):
+        user_ids = {identity['user_id'] for identity in identities.values() if identity.get('user_id')}
+        emails = {identity['email'] for identity in identities.values() if identity.get('email')}
+        if not user_ids and not emails:
+            return {comment_id: False for comment_id in identities}
+        blocked_users = list(self.filter(
+            models.Q(user_id__in=user_ids) | models.Q(email__in=emails), blocked=True
+        ).values_list('user_id', 'email'))
+        blocked_ids = {user_id for user_id, _ in blocked_users}
+        blocked_emails = {email for _, email in blocked_users}
+        return {
+            comment_id: (
+                identity['user_id'] in blocked_ids if 'user_id' in identity else identity['email'] in blocked_emails
+            )
+            for comment_id, identity in identities.items()
+        }
 
     def get_or_create_blocked_user_for_comment(self, comment):
         user_id = comment.user.id if comment.user else None
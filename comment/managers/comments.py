@@ -1,17 +1,17 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import models, transaction
 
 from comment.conf import settings
-from comment.utils import id_generator
+from comment.utils import get_user_related_lookups, id_generator, should_exclude_flagged, time_ordered_id_generator
 
 
 class CommentManager(models.Manager):
+    RANDOM_URLHASH = 'random'
+    TIME_URLHASH = 'time'
 
     def all_exclude_flagged(self):
         """Filter out comments that have been flagged"""
-        allowed_flags = getattr(settings, 'COMMENT_FLAGS_ALLOWED', 0)
-        show_flagged = getattr(settings, 'COMMENT_SHOW_FLAGGED', False)
-        if not allowed_flags or show_flagged:
+        if not should_exclude_flagged():
             return super().get_queryset()
 
         return super().get_queryset().exclude(flag__state__exact=2)
@@ -38,9 +38,73 @@ class CommentManager(models.Manager):
 
         return self._filter_parents(qs)
 
+    @staticmethod
+    def get_related_lookups():
+        """Relations displayed along with each comment, the profile of the author included when configured"""
+        return [*get_user_related_lookups(), 'reaction', 'flag']
+
+    def all_with_related(self):
+        return self.select_related(*self.get_related_lookups())
+
+    @staticmethod
+    def get_replies_attr(include_flagged=False):
+        """Name of the attribute that holds the replies attached to a parent comment by the thread loader"""
+        if include_flagged:
+            return 'prefetched_replies_with_flagged'
+        return 'prefetched_replies'
+
+    def _get_replies_prefetch(self, include_flagged=False):
+        manager = self.model.objects
+        if include_flagged:
+            qs = manager.all()
+        else:
+            qs = manager.all_exclude_flagged()
+        replies_qs = qs.select_related(*self.get_related_lookups()).order_by(*settings.COMMENT_ORDER_BY)
+        return models.Prefetch('comment_set', queryset=replies_qs, to_attr=self.get_replies_attr(include_flagged))
+
+    def filter_parents_with_replies(self, obj, include_flagged=False):
+        """
+        Thread loader: parent comments of the object along with their replies.
+        The replies of all parents are fetched in a single query and attached to each parent, so a whole page of
+        comments is loaded in a constant number of queries regardless of the number of parents and replies.
+        """
+        return self.filter_parents_by_object(obj, include_flagged=include_flagged).select_related(
+            *self.get_related_lookups()
+        ).prefetch_related(self._get_replies_prefetch(include_flagged=include_flagged))
+
+    def filter_parents_without_replies(self, obj, include_flagged=False):
+        """Parent comments of the object when their replies are loaded on demand, see `filter_with_replies`"""
+        return self.filter_parents_by_object(obj, include_flagged=include_flagged).select_related(
+            *self.get_related_lookups()
+        )
+
+    def filter_with_replies(self, include_flagged=False):
+        """Parent comments with their replies attached, used for loading the replies of a single parent"""
+        if include_flagged:
+            qs = self.all()
+        else:
+            qs = self.all_exclude_flagged()
+        return qs.filter(parent=None).select_related(*self.get_related_lookups()).prefetch_related(
+            self._get_replies_prefetch(include_flagged=include_flagged)
+        )
+
+    def filter_parents_with_replies_and_reactions(self, obj, include_flagged=False):
+        """
+        Thread loader used by the API: along with the replies, the reaction and flag instances of all the comments and
+        their users are prefetched, one query per table.
+        """
+        lookups = ['reaction__reactions__user', 'flag__flags__user']
+        replies_attr = self.get_replies_attr(include_flagged)
+        return self.filter_parents_with_replies(obj, include_flagged=include_flagged).prefetch_related(
+            *lookups, *['{}__{}'.format(replies_attr, lookup) for lookup in lookups]
+        )
+
     @staticmethod
     def generate_urlhash():
-        return id_generator(
+        generator = id_generator
+        if settings.COMMENT_URL_ID_GENERATOR == CommentManager.TIME_URLHASH:
+            generator = time_ordered_id_generator
+        return generator(
             prefix=settings.COMMENT_URL_PREFIX,
             len_id=settings.COMMENT_URL_ID_LENGTH,
             suffix=settings.COMMENT_URL_SUFFIX
@@ -54,5 +118,38 @@ class CommentManager(models.Manager):
                 parent_comment = parent_qs.first()
         return parent_comment
 
+    def _update_reply_count(self, reply, value):
+        qs = self.filter(id=reply.parent_id)
+        if value < 0:
+            qs = qs.filter(reply_count__gt=0)
+        qs.update(reply_count=models.F('reply_count') + value)
+        # keep the parent instance loaded in memory in sync with the database
+        if self.model.parent.is_cached(reply):
+            reply.parent.reply_count = max(reply.parent.reply_count + value, 0)
+
+    def increase_reply_count(self, reply):
+        self._update_reply_count(reply, 1)
+
+    def decrease_reply_count(self, reply):
+        self._update_reply_count(reply, -1)
+
+    def refresh_flagged_reply_count(self, parent_id):
+        flagged_count = self.filter(parent_id=parent_id, flag__state__exact=2).count()
+        self.filter(id=parent_id).update(flagged_reply_count=flagged_count)
+
+    def rebuild_reply_counts(self, batch_size=1000):
+        """Recompute the stored reply counts of all parent comments from the replies in the database"""
+        counts = self.exclude(parent=None).order_by().values('parent').annotate(
+            total=models.Count('id'),
+            flagged=models.Count('id', filter=models.Q(flag__state__exact=2))
+        )
+        parents = [
+            self.model(id=item['parent'], reply_count=item['total'], flagged_reply_count=item['flagged'])
+            for item in counts
+        ]
+        with transaction.atomic():
+            self.update(reply_count=0, flagged_reply_count=0)
+            self.bulk_update(parents, ['reply_count', 'flagged_reply_count'], batch_size=batch_size)
+
     def comment_exists(self, comment):
         return self.model.objects.filter(email=comment.email, posted=comment.posted).exists()
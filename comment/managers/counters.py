@@ -0,0 +1,57 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction, IntegrityError
+
+
+class CommentCounterManager(models.Manager):
+    def _filter_for_comment(self, comment):
+        return self.filter(content_type_id=comment.content_type_id, object_id=comment.object_id)
+
+    def get_count_for_object(self, obj, include_flagged=False):
+        content_type = ContentType.objects.get_for_model(obj.__class__)
+        counter = self.filter(content_type=content_type, object_id=obj.id).first()
+        if not counter:
+            return 0
+        return counter.get_count(include_flagged=include_flagged)
+
+    def increase_count(self, comment):
+        if self._filter_for_comment(comment).update(comment_count=models.F('comment_count') + 1):
+            return
+        try:
+            with transaction.atomic():
+                self.create(content_type_id=comment.content_type_id, object_id=comment.object_id, comment_count=1)
+        except IntegrityError:
+            # the counter has been created by a concurrent request
+            self._filter_for_comment(comment).update(comment_count=models.F('comment_count') + 1)
+
+    def decrease_count(self, comment):
+        self._filter_for_comment(comment).filter(comment_count__gt=0).update(
+            comment_count=models.F('comment_count') - 1
+        )
+
+    def refresh_flagged_count(self, comment):
+        comment_model = apps.get_model('comment', 'Comment')
+        flagged_count = comment_model.objects.filter(
+            content_type_id=comment.content_type_id, object_id=comment.object_id, flag__state__exact=2
+        ).count()
+        self._filter_for_comment(comment).update(flagged_count=flagged_count)
+
+    def rebuild(self, batch_size=1000):
+        """Recompute the stored comment counts of all objects from the comments in the database"""
+        comment_model = apps.get_model('comment', 'Comment')
+        counts = comment_model.objects.order_by().values('content_type', 'object_id').annotate(
+            total=models.Count('id'),
+            flagged=models.Count('id', filter=models.Q(flag__state__exact=2))
+        )
+        counters = [
+            self.model(
+                content_type_id=item['content_type'],
+                object_id=item['object_id'],
+                comment_count=item['total'],
+                flagged_count=item['flagged']
+            )
+            for item in counts
+        ]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(counters, batch_size=batch_size)
@@ -1,6 +1,7 @@
 from collections import namedtuple
 
-from django.db import models, IntegrityError
+from django.apps import apps
+from django.db import models, IntegrityError, transaction
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.utils.translation import gettext_lazy as _
 
@@ -16,6 +17,39 @@ class FlagManager(models.Manager):
             flag = self.create(comment=comment)
         return flag
 
+    def get_stale_states(self):
+        """
+        Return the flags to be flagged and the flags to be unflagged according to `COMMENT_FLAGS_ALLOWED`, following
+        the same rule as `Flag.toggle_flagged_state`.
+        """
+        allowed_flags = settings.COMMENT_FLAGS_ALLOWED
+        if not allowed_flags:
+            return self.none(), self.none()
+        should_flag = models.Q(count__gt=allowed_flags) & ~models.Q(
+            state__in=[self.model.RESOLVED, self.model.REJECTED]
+        )
+        to_flag = self.filter(should_flag).exclude(state=self.model.FLAGGED)
+        to_unflag = self.exclude(should_flag).exclude(state=self.model.UNFLAGGED)
+        return to_flag, to_unflag
+
+    def refresh_states(self, dry_run=False):
+        """
+        Set the state of all flags in a couple of statements and rebuild the flagged counts when any changed.
+        Return the number of flags flagged and unflagged.
+        """
+        to_flag, to_unflag = self.get_stale_states()
+        if dry_run:
+            return to_flag.count(), to_unflag.count()
+
+        with transaction.atomic():
+            flagged = to_flag.update(state=self.model.FLAGGED)
+            unflagged = to_unflag.update(state=self.model.UNFLAGGED)
+            if flagged or unflagged:
+                # updating in bulk does not send the signals that keep the flagged counts in sync
+                apps.get_model('comment', 'Comment').objects.rebuild_reply_counts()
+                apps.get_model('comment', 'CommentCounter').objects.rebuild()
+        return flagged, unflagged
+
 
 class FlagInstanceManager(models.Manager):
 
@@ -29,6 +63,10 @@ class FlagInstanceManager(models.Manager):
 
     reason_values = [reason.value for reason in reasons_list]
 
+    def get_flagged_comment_ids(self, user, comments):
+        """Return the ids of the comments flagged by the user"""
+        return set(self.filter(user=user, flag__comment__in=comments).values_list('flag__comment_id', flat=True))
+
     def _clean_reason(self, reason):
         err = ValidationError(FlagError.REASON_INVALID.format(reason=reason), code='invalid')
         try:
@@ -1,5 +1,5 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import connections, models
 
 
 class FollowerManager(models.Manager):
@@ -7,6 +7,20 @@ class FollowerManager(models.Manager):
         content_type = ContentType.objects.get_for_model(model_object)
         return self.filter(email=email, object_id=model_object.id, content_type=content_type).exists()
 
+    def get_followed_objects(self, email, model_objects):
+        """Return the `(content_type_id, object_id)` of the objects followed by the email"""
+        objects_by_content_type = {}
+        for model_object in model_objects:
+            content_type = ContentType.objects.get_for_model(model_object)
+            objects_by_content_type.setdefault(content_type.id, []).append(model_object.id)
+        if not email or not objects_by_content_type:
+            return set()
+
+        condition = models.Q()
+        for content_type_id, object_ids in objects_by_content_type.items():
+            condition |= models.Q(content_type_id=content_type_id, object_id__in=object_ids)
+        return set(self.filter(condition, email=email).values_list('content_type_id', 'object_id'))
+
     def follow(self, email, username, model_object):
         if not email or self.is_following(email, model_object):
             return None
@@ -26,17 +40,27 @@ class FollowerManager(models.Manager):
         return True
 
     def follow_parent_thread_for_comment(self, comment):
-        """This method is used to set the comment's creator as a follower of own comment and the parent thread"""
+        """
+        This method is used to set the comment's creator as a follower of own comment and the parent thread.
+        The followers are inserted in a single statement, ignoring the objects that are already followed.
+        """
         if not comment.email:
             return
         username = comment.get_username()
-        model_object = comment
-        if not comment.is_parent:
-            model_object = comment.parent
-        else:
+        if comment.is_parent:
             # follow the main thread for parent comment
-            self.follow(comment.email, username, comment.content_object)
-        self.follow(comment.email, username, model_object)
+            model_objects = [comment.content_object, comment]
+        else:
+            model_objects = [comment.parent]
+
+        if not connections[self.db].features.supports_ignore_conflicts:
+            for model_object in model_objects:
+                self.follow(comment.email, username, model_object)
+            return
+        self.bulk_create([
+            self.model(email=comment.email, username=username, content_object=model_object)
+            for model_object in model_objects
+        ], ignore_conflicts=True)
 
     def filter_for_model_object(self, model_obj):
         content_type = ContentType.objects.get_for_model(model_obj)
@@ -0,0 +1,64 @@
+from django.db import connections, models, router
+from django.utils import timezone
+
+from comment.conf import settings
+
+
+class OutboxEmailManager(models.Manager):
+    def add_notification(self, comment, request):
+        return self.create(kind=self.model.NOTIFICATION, comment=comment, host=request.get_host())
+
+    def add_confirmation(self, key, request, api=False):
+        return self.create(kind=self.model.CONFIRMATION, confirmation_key=key, api=api, host=request.get_host())
+
+    def add_digest(self, comment, request):
+        return self.create(kind=self.model.DIGEST, comment=comment, host=request.get_host())
+
+    def retry_digest(self, pending, receivers, error):
+        """
+        Store the comments of a digest that failed part way for the followers not reached. `pending` are the digest
+        emails the digest was sent for and `receivers` yields the email of each follower not reached with the ids of the
+        comments due to them.
+        """
+        pending = {email.comment_id: email for email in pending}
+        self.bulk_create((
+            self.model(
+                kind=self.model.DIGEST,
+                comment_id=comment_id,
+                host=pending[comment_id].host,
+                receiver=receiver,
+                attempts=pending[comment_id].attempts + 1,
+                last_error=str(error),
+            )
+            for receiver, comment_ids in receivers for comment_id in comment_ids
+        ), batch_size=settings.COMMENT_FOLLOWERS_CHUNK_SIZE)
+
+    def filter_pending(self):
+        """Emails due to be sent, emails that failed too many times are left for inspection"""
+        return self.exclude(kind=self.model.DIGEST).filter(
+            attempts__lt=settings.COMMENT_OUTBOX_MAX_ATTEMPTS, next_attempt__lte=timezone.now()
+        )
+
+    def _select_for_update(self, qs):
+        """
+        Lock the outbox rows only, comments loaded through `select_related` are joined on the nullable side of an
+        outer join which cannot be locked on some backends.
+        """
+        features = connections[router.db_for_write(self.model)].features
+        return qs.select_for_update(
+            skip_locked=features.has_select_for_update_skip_locked,
+            of=('self',) if features.has_select_for_update_of else (),
+        )
+
+    def lock_pending(self, batch_size):
+        """A batch of pending emails, skipping the ones locked by another worker. Must be called in a transaction"""
+        return self._select_for_update(self.filter_pending().order_by('id'))[:batch_size]
+
+    def lock_digests(self):
+        """
+        The comments waiting for the next digest, skipping the ones locked by another worker. Comments that failed too
+        many times are left for inspection.
+        """
+        return self._select_for_update(self.filter(
+            kind=self.model.DIGEST, attempts__lt=settings.COMMENT_OUTBOX_MAX_ATTEMPTS
+        ).order_by('id'))
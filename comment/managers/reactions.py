@@ -1,5 +1,5 @@
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
 
 from comment.messages import ReactionError
 
@@ -24,22 +24,37 @@ class ReactionInstanceManager(models.Manager):
 
         raise ValidationError(ReactionError.TYPE_INVALID.format(reaction_type=reaction_type), code='invalid')
 
-    def _delete_and_create_new_instance(self, instance, user, reaction_type):
+    def _toggle_instance(self, instance, reaction_type):
+        """
+        Delete the instance when the same reaction is set again, otherwise switch its type in place.
+        Switching saves the instance with `update_fields`, hence `post_save` is still sent (with `created=False`).
+        """
         old_reaction_type = instance.reaction_type
-        reaction_obj = instance.reaction
-        instance.delete()
-        if old_reaction_type != reaction_type:  # create the new instance
-            reaction_obj.refresh_from_db()
-            self.create(reaction=reaction_obj, user=user, reaction_type=reaction_type)
+        if old_reaction_type == reaction_type:
+            instance.delete()
+            return
+
+        with transaction.atomic(using=self.db):
+            instance.reaction_type = reaction_type
+            instance.save(update_fields=['reaction_type', 'date_reacted'])
+            instance.reaction.switch_reaction_count(old_reaction_type, reaction_type)
+
+    def get_reaction_types_for_user(self, user, comments):
+        """Return a dict mapping the id of each comment the user reacted on to the type of the reaction"""
+        return dict(
+            self.filter(user=user, reaction__comment__in=comments).values_list('reaction__comment_id', 'reaction_type')
+        )
 
     def set_reaction(self, user, reaction, reaction_type):
         reaction_type = self.clean_reaction_type(reaction_type=reaction_type)
         created = False
         try:
             instance = self.get(reaction=reaction, user=user)
+            # the counts are updated on the reaction object of the caller
+            instance.reaction = reaction
         except models.ObjectDoesNotExist:
             instance = self.create(reaction=reaction, user=user, reaction_type=reaction_type)
             created = True
 
         if not created:
-            self._delete_and_create_new_instance(instance=instance, user=user, reaction_type=reaction_type)
+            self._toggle_instance(instance=instance, reaction_type=reaction_type)
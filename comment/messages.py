@@ -77,6 +77,7 @@ class EmailInfo:
     INPUT_PLACEHOLDER = _('email address, this will be used for verification.')
     INPUT_TITLE = _('email address, it will be used for verification.')
     NOTIFICATION_SUBJECT = _('{username} added comment to "{thread_name}"')
+    DIGEST_SUBJECT = _('New comments on the threads you follow')
     LABEL = _('email')
 
 
@@ -0,0 +1,68 @@
+# Generated by Django 4.0.10 on 2026-10-18 05:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FLAGGED = 2
+
+
+def set_comment_counts(apps, schema_editor):
+    comment_model = apps.get_model('comment', 'Comment')
+    counter_model = apps.get_model('comment', 'CommentCounter')
+    flagged = models.Count('id', filter=models.Q(flag__state=FLAGGED))
+
+    reply_counts = comment_model.objects.exclude(parent=None).order_by().values('parent').annotate(
+        total=models.Count('id'), flagged=flagged
+    )
+    for item in reply_counts:
+        comment_model.objects.filter(id=item['parent']).update(
+            reply_count=item['total'], flagged_reply_count=item['flagged']
+        )
+
+    comment_counts = comment_model.objects.order_by().values('content_type', 'object_id').annotate(
+        total=models.Count('id'), flagged=flagged
+    )
+    counter_model.objects.bulk_create([
+        counter_model(
+            content_type_id=item['content_type'],
+            object_id=item['object_id'],
+            comment_count=item['total'],
+            flagged_count=item['flagged']
+        )
+        for item in comment_counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('comment', '0012_blockeduser_blockeduserhistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='flagged_reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CommentCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('flagged_count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(set_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.10 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0013_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockeduser',
+            index=models.Index(fields=['email', 'blocked'], name='blockeduser_email_blocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', '-posted'], name='comment_object_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                condition=models.Q(parent=None),
+                fields=['content_type', 'object_id', '-posted'],
+                name='comment_object_parents_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['email', 'posted'], name='comment_email_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['content_type', 'object_id'], name='follower_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['email', 'content_type', 'object_id'], name='follower_email_object_idx'),
+        ),
+    ]
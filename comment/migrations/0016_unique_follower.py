@@ -0,0 +1,33 @@
+# Generated by Django 4.0.10 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+
+def remove_duplicate_followers(apps, schema_editor):
+    follower_model = apps.get_model('comment', 'Follower')
+    duplicates = follower_model.objects.order_by().values('email', 'content_type', 'object_id').annotate(
+        first_id=models.Min('id'), count=models.Count('id')
+    ).filter(count__gt=1)
+    for item in duplicates:
+        follower_model.objects.filter(
+            email=item['email'], content_type=item['content_type'], object_id=item['object_id']
+        ).exclude(id=item['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0015_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_followers, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='follower',
+            name='follower_email_object_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='follower',
+            constraint=models.UniqueConstraint(fields=('email', 'content_type', 'object_id'), name='unique_follower'),
+        ),
+    ]
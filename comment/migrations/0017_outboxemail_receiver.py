@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0016_unique_follower'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='receiver',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+    ]
@@ -3,6 +3,8 @@ from comment.models.reactions import Reaction, ReactionInstance
 from comment.models.flags import Flag, FlagInstance
 from comment.models.followers import Follower
 from comment.models.blocker import BlockedUser, BlockedUserHistory
+from comment.models.counters import CommentCounter
+from comment.models.outbox import OutboxEmail
 from comment.managers import (
     CommentManager, ReactionManager, ReactionInstanceManager, FlagManager, FlagInstanceManager, FollowerManager,
     BlockedUserManager, BlockedUserHistoryManager,
@@ -17,6 +19,8 @@ __all__ = (
     'Follower',
     'BlockedUser',
     'BlockedUserHistory',
+    'CommentCounter',
+    'OutboxEmail',
     # TODO: managers are given here due to the earlier namespace pollutin caused by star imports,
     # remove these along with their imports in v3.0.0
     'CommentManager',
@@ -12,6 +12,11 @@ class BlockedUser(models.Model):
 
     objects = BlockedUserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['email', 'blocked'], name='blockeduser_email_blocked_idx'),
+        ]
+
     def __str__(self):
         return getattr(self.user, self.user.USERNAME_FIELD) if self.user else self.email
 
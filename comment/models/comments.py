@@ -3,12 +3,13 @@ from math import ceil
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 from django.utils import timezone
 
 from comment.managers import CommentManager
 from comment.conf import settings
-from comment.utils import is_comment_moderator
+from comment.pagination import encode_cursor
+from comment.utils import is_comment_moderator, should_exclude_flagged
 
 
 class Comment(models.Model):
@@ -26,11 +27,23 @@ class Comment(models.Model):
         )
     posted = models.DateTimeField(default=timezone.now, editable=False)
     edited = models.DateTimeField(auto_now=True)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    flagged_reply_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = CommentManager()
 
     class Meta:
         ordering = ['-posted', ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', '-posted'], name='comment_object_posted_idx'),
+            # parent comments of an object, partial index is skipped on backends that do not support it
+            models.Index(
+                fields=['content_type', 'object_id', '-posted'],
+                condition=models.Q(parent=None),
+                name='comment_object_parents_idx'
+            ),
+            models.Index(fields=['email', 'posted'], name='comment_email_posted_idx'),
+        ]
 
     def __str__(self):
         username = self.get_username()
@@ -67,11 +80,43 @@ class Comment(models.Model):
 
         return manager._filter_parents(qs, parent=self)
 
-    def _set_unique_urlhash(self):
-        if not self.urlhash:
-            self.urlhash = self.__class__.objects.generate_urlhash()
-            while self.__class__.objects.filter(urlhash=self.urlhash).exists():
-                self.urlhash = self.__class__.objects.generate_urlhash()
+    def _get_prefetched_replies(self, include_flagged=False):
+        return getattr(self, self.__class__.objects.get_replies_attr(include_flagged), None)
+
+    def get_replies(self, include_flagged=False):
+        """Return the replies attached by the thread loader if available, otherwise query them"""
+        replies = self._get_prefetched_replies(include_flagged=include_flagged)
+        if replies is not None:
+            return replies
+        return self.replies(include_flagged=include_flagged)
+
+    def get_replies_count(self, include_flagged=False):
+        if include_flagged or not should_exclude_flagged():
+            return self.reply_count
+        return self.reply_count - self.flagged_reply_count
+
+    def _save_with_unique_urlhash(self, *args, **kwargs):
+        """
+        Rely on the unique constraint of `urlhash` instead of checking that the generated value is not taken before
+        inserting the comment. Time ordered values do not collide, random values are generated again when taken.
+        """
+        manager = self.__class__.objects
+        if settings.COMMENT_URL_ID_GENERATOR == manager.TIME_URLHASH:
+            self.urlhash = manager.generate_urlhash()
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        for attempt in range(1, settings.COMMENT_URL_ID_MAX_ATTEMPTS + 1):
+            self.urlhash = manager.generate_urlhash()
+            try:
+                # a savepoint keeps an enclosing transaction usable when the insert fails
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == settings.COMMENT_URL_ID_MAX_ATTEMPTS:
+                    raise
+                if not manager.using(using).filter(urlhash=self.urlhash).exists():
+                    raise
 
     def _set_email(self):
         if self.user:
@@ -91,14 +136,20 @@ class Comment(models.Model):
         return getattr(user, user.USERNAME_FIELD)
 
     def save(self, *args, **kwargs):
-        self._set_unique_urlhash()
         self._set_email()
-        super(Comment, self).save(*args, **kwargs)
+        if self._state.adding and not self.urlhash:
+            self._save_with_unique_urlhash(*args, **kwargs)
+        else:
+            super(Comment, self).save(*args, **kwargs)
 
     def get_url(self, request):
         page_url = self.content_object.get_absolute_url()
         comments_per_page = settings.COMMENT_PER_PAGE
-        if comments_per_page:
+        if comments_per_page and settings.COMMENT_USE_CURSOR_PAGINATION:
+            # link to the page that starts with the thread of the comment instead of counting the comments before it
+            thread = self if self.is_parent else self.parent
+            page_url += '?cursor=' + encode_cursor(thread.posted, thread.id)
+        elif comments_per_page:
             qs_all_parents = self.__class__.objects.filter_parents_by_object(
                 self.content_object, include_flagged=is_comment_moderator(request.user)
                 )
@@ -109,7 +160,7 @@ class Comment(models.Model):
 
     @property
     def is_parent(self):
-        return self.parent is None
+        return self.parent_id is None
 
     @property
     def is_edited(self):
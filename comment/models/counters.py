@@ -0,0 +1,28 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.db import models
+
+from comment.managers import CommentCounterManager
+from comment.utils import should_exclude_flagged
+
+
+class CommentCounter(models.Model):
+    """Number of comments posted on a model object, maintained by the comment signals"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey()
+    comment_count = models.PositiveIntegerField(default=0)
+    flagged_count = models.PositiveIntegerField(default=0)
+
+    objects = CommentCounterManager()
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return f'{self.comment_count} comments on {str(self.content_object)}'
+
+    def get_count(self, include_flagged=False):
+        if include_flagged or not should_exclude_flagged():
+            return self.comment_count
+        return self.comment_count - self.flagged_count
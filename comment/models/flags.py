@@ -7,6 +7,7 @@ from comment.conf import settings
 from comment.managers import FlagManager, FlagInstanceManager
 from comment.models import Comment
 from comment.messages import FlagError, FlagState
+from comment.utils import update_counters
 
 
 User = get_user_model()
@@ -37,18 +38,12 @@ class Flag(models.Model):
     objects = FlagManager()
 
     def increase_count(self):
-        """Increase flag count and save the model """
-        self.refresh_from_db()
-        field = 'count'
-        self.count = models.F(field) + 1
-        self.save(update_fields=[field])
+        """Increase flag count and set the stored value on the model """
+        update_counters(self, count=1)
 
     def decrease_count(self):
-        """Decrease flag count and save the model """
-        self.refresh_from_db()
-        field = 'count'
-        self.count = models.F(field) - 1
-        self.save(update_fields=[field])
+        """Decrease flag count and set the stored value on the model """
+        update_counters(self, count=-1)
 
     @property
     def comment_author(self):
@@ -91,13 +86,11 @@ class Flag(models.Model):
         allowed_flags = settings.COMMENT_FLAGS_ALLOWED
         if not allowed_flags:
             return
-        self.refresh_from_db()
         if self.count > allowed_flags and self.state not in [self.RESOLVED, self.REJECTED]:
             self.state = self.FLAGGED
-            self.save()
         else:
             self.state = self.UNFLAGGED
-            self.save()
+        self.save(update_fields=['state'])
 
 
 class FlagInstance(models.Model):
@@ -14,6 +14,14 @@ class Follower(models.Model):
 
     objects = FollowerManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='follower_object_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['email', 'content_type', 'object_id'], name='unique_follower'),
+        ]
+
     def __str__(self):
         return f'{str(self.content_object)} followed by {self.email}'
 
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.db import models
+from django.http import HttpRequest
+from django.utils import timezone
+
+from comment.conf import settings
+from comment.managers import OutboxEmailManager
+from comment.models import Comment
+
+
+class OutboxEmail(models.Model):
+    """
+    An email stored in the same transaction as its comment when `COMMENT_EMAIL_USE_OUTBOX` is enabled, and sent later by
+    the `send_comment_emails` management command.
+    With `COMMENT_NOTIFICATION_DIGEST` the new comments are stored instead and notified by `send_comment_digests`, the
+    comments left over from a digest that failed part way are stored with the `receiver` they are still due to.
+    """
+    NOTIFICATION = 1
+    CONFIRMATION = 2
+    DIGEST = 3
+    KIND_CHOICES = [
+        (NOTIFICATION, 'notification'),
+        (CONFIRMATION, 'confirmation'),
+        (DIGEST, 'digest'),
+    ]
+
+    kind = models.SmallIntegerField(choices=KIND_CHOICES)
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, blank=True)
+    confirmation_key = models.TextField(blank=True)
+    api = models.BooleanField(default=False)
+    host = models.CharField(max_length=255, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    receiver = models.EmailField(blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['attempts', 'next_attempt'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} email {self.id}'
+
+    def get_request(self):
+        """A request for the host the comment was posted on, used to resolve the current site in the email"""
+        request = HttpRequest()
+        request.META['HTTP_HOST'] = self.host
+        return request
+
+    def retry_later(self, error):
+        """Back off exponentially, the delay is doubled after every failed attempt"""
+        self.attempts += 1
+        self.next_attempt = timezone.now() + timedelta(
+            seconds=settings.COMMENT_OUTBOX_RETRY_DELAY * 2 ** (self.attempts - 1)
+        )
+        self.last_error = str(error)
+        self.save(update_fields=['attempts', 'next_attempt', 'last_error'])
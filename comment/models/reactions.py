@@ -6,6 +6,7 @@ from django.utils import timezone
 
 from comment.models import Comment
 from comment.managers import ReactionManager, ReactionInstanceManager
+from comment.utils import update_counters
 
 
 class Reaction(models.Model):
@@ -15,15 +16,14 @@ class Reaction(models.Model):
 
     objects = ReactionManager()
 
+    def _update_counts(self, **counters):
+        update_counters(self, returning=['likes', 'dislikes'], **counters)
+
     def _increase_count(self, field):
-        self.refresh_from_db()
-        setattr(self, field, models.F(field) + 1)
-        self.save(update_fields=[field])
+        self._update_counts(**{field: 1})
 
     def _decrease_count(self, field):
-        self.refresh_from_db()
-        setattr(self, field, models.F(field) - 1)
-        self.save(update_fields=[field])
+        self._update_counts(**{field: -1})
 
     def increase_reaction_count(self, reaction):
         if reaction == ReactionInstance.ReactionType.LIKE.value:
@@ -37,6 +37,15 @@ class Reaction(models.Model):
         else:
             self._decrease_count('dislikes')
 
+    def switch_reaction_count(self, old_reaction, new_reaction):
+        """Move one reaction from the `old_reaction` counter to the `new_reaction` counter in a single statement"""
+        if old_reaction == new_reaction:
+            return
+        if new_reaction == ReactionInstance.ReactionType.LIKE.value:
+            self._update_counts(likes=1, dislikes=-1)
+        else:
+            self._update_counts(likes=-1, dislikes=1)
+
 
 class ReactionInstance(models.Model):
 
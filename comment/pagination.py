@@ -0,0 +1,92 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from comment.conf import settings
+
+
+def encode_cursor(posted, comment_id):
+    """Cursor of the page starting at the parent comment posted at `posted` with the id `comment_id`"""
+    value = '{}|{}'.format(posted.isoformat(), comment_id)
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the `(posted, id)` marker of the cursor or `None` when it is invalid"""
+    try:
+        posted, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        posted = parse_datetime(posted)
+        comment_id = int(comment_id)
+    except (ValueError, TypeError, AttributeError, binascii.Error, UnicodeDecodeError):
+        return None
+    if not posted:
+        return None
+    return posted, comment_id
+
+
+class CursorPage(Sequence):
+    """A page of comments selected by a cursor, it mirrors the part of django's `Page` used by the templates"""
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, has_previous=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _get_ordering():
+    if list(settings.COMMENT_ORDER_BY)[:1] == ['posted']:
+        return ('posted', 'id'), ('-posted', '-id')
+    return ('-posted', '-id'), ('posted', 'id')
+
+
+def paginate_comments_by_cursor(comments, comments_per_page, cursor=None):
+    """
+    Keyset pagination on `(posted, id)`: a page starts at the comment of the cursor and is fetched without counting or
+    skipping the comments before it.
+    """
+    ordering, reversed_ordering = _get_ordering()
+    comments = comments.order_by(*ordering)
+    marker = decode_cursor(cursor) if cursor else None
+    previous_cursor = None
+    has_previous = False
+    if marker:
+        posted, comment_id = marker
+        if ordering[0] == 'posted':
+            from_marker = Q(posted__gt=posted) | Q(posted=posted, id__gte=comment_id)
+        else:
+            from_marker = Q(posted__lt=posted) | Q(posted=posted, id__lte=comment_id)
+        previous_markers = list(
+            comments.exclude(from_marker).prefetch_related(None).order_by(*reversed_ordering).values_list(
+                'posted', 'id'
+            )[:comments_per_page + 1]
+        )
+        has_previous = bool(previous_markers)
+        # the previous page is the first one when there are not enough comments before this page
+        if len(previous_markers) > comments_per_page:
+            previous_cursor = encode_cursor(*previous_markers[comments_per_page - 1])
+        comments = comments.filter(from_marker)
+
+    object_list = list(comments[:comments_per_page + 1])
+    next_cursor = None
+    if len(object_list) > comments_per_page:
+        next_comment = object_list.pop()
+        next_cursor = encode_cursor(next_comment.posted, next_comment.id)
+    return CursorPage(object_list, next_cursor, previous_cursor, has_previous)
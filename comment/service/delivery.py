@@ -0,0 +1,125 @@
+import atexit
+import logging
+import os
+import queue
+from threading import Lock, Thread
+
+from django.core.mail import get_connection
+
+from comment.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDeliveryWorker:
+    """
+    Deliver emails in the background with a bounded pool of threads.
+
+    Messages are put on a bounded queue. Each thread takes up to `COMMENT_EMAIL_BATCH_SIZE` messages at once and
+    sends them through its own mail connection, which is kept open while messages keep coming and closed once the
+    thread has been idle for `COMMENT_EMAIL_CONNECTION_IDLE_TIMEOUT` seconds.
+    When the queue is full, `COMMENT_EMAIL_QUEUE_FULL_POLICY` decides whether the sender waits for room ('block') or
+    the messages are discarded ('drop').
+    With `COMMENT_EMAIL_SYNC_DELIVERY` the messages are sent right away in the calling thread instead.
+    The threads are started again in a process forked after they were started, e.g. by a pre-forking server.
+    """
+    BLOCK = 'block'
+    DROP = 'drop'
+    _STOP = object()
+
+    def __init__(self):
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self._lock = Lock()
+
+    @property
+    def is_running(self):
+        # threads are not copied to a forked process
+        return bool(self._threads) and self._pid == os.getpid()
+
+    def start(self):
+        with self._lock:
+            if self.is_running:
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            self._queue = queue.Queue(maxsize=settings.COMMENT_EMAIL_QUEUE_SIZE)
+            for index in range(settings.COMMENT_EMAIL_WORKERS):
+                # threads keep the queue they were started with, another one is created when starting again
+                thread = Thread(
+                    target=self._run, args=(self._queue,), name='comment-email-{}'.format(index), daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def send(self, messages):
+        if settings.COMMENT_EMAIL_SYNC_DELIVERY:
+            get_connection().send_messages(messages)
+            return
+        self.start()
+        block = settings.COMMENT_EMAIL_QUEUE_FULL_POLICY != self.DROP
+        for index, message in enumerate(messages):
+            try:
+                self._queue.put(message, block=block)
+            except queue.Full:
+                logger.warning('Email delivery queue is full, %d message(s) were dropped', len(messages) - index)
+                return
+
+    def join(self):
+        """Block until all the queued messages have been processed"""
+        if self.is_running:
+            self._queue.join()
+
+    def shutdown(self, wait=True):
+        """Stop the threads once the queued messages are sent"""
+        with self._lock:
+            threads = self._threads if self.is_running else []
+            self._threads = []
+            for _ in threads:
+                self._queue.put(self._STOP)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _get_batch(self, messages_queue, connection):
+        timeout = settings.COMMENT_EMAIL_CONNECTION_IDLE_TIMEOUT
+        try:
+            message = messages_queue.get(timeout=timeout)
+        except queue.Empty:
+            connection.close()
+            message = messages_queue.get()
+
+        batch = [message]
+        while message is not self._STOP and len(batch) < settings.COMMENT_EMAIL_BATCH_SIZE:
+            try:
+                message = messages_queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(message)
+        return batch
+
+    def _run(self, messages_queue):
+        connection = get_connection()
+        while True:
+            batch = self._get_batch(messages_queue, connection)
+            messages = [message for message in batch if message is not self._STOP]
+            try:
+                if messages:
+                    # an explicitly opened connection is not closed by the backend after sending
+                    connection.open()
+                    connection.send_messages(messages)
+            except Exception:
+                logger.exception('Failed to send %d email message(s)', len(messages))
+                connection.close()
+            finally:
+                for _ in batch:
+                    messages_queue.task_done()
+            if len(messages) != len(batch):
+                connection.close()
+                return
+
+
+email_delivery = EmailDeliveryWorker()
+atexit.register(email_delivery.shutdown)
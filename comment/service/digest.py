@@ -0,0 +1,124 @@
+from collections import defaultdict
+from functools import reduce
+from itertools import groupby
+from operator import attrgetter, or_
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Q
+
+from comment.conf import settings
+from comment.messages import EmailInfo
+from comment.models import Follower, OutboxEmail
+from comment.service.email import DABEmailService
+
+
+class DABDigestService(DABEmailService):
+    """Notify each follower once about all the new comments on the threads they follow"""
+    def __init__(self, comments, request, connection=None, receivers=None):
+        super().__init__(None, request, connection=connection)
+        self.threads = self.get_threads(comments)
+        # the ids of the comments due to some followers only, mapped to their emails
+        self.receivers = receivers or {}
+        self.notified = set()
+
+    def get_threads(self, comments):
+        """The comments grouped by their thread: the content object for parent comments and the parent for replies"""
+        threads = {}
+        for comment in comments:
+            service = DABEmailService(comment, self.request)
+            thread = service.get_thread()
+            key = (ContentType.objects.get_for_model(thread).id, thread.id)
+            if key not in threads:
+                threads[key] = {
+                    'name': service.get_thread_name(),
+                    'url': comment.content_object.get_absolute_url(),
+                    'comments': [],
+                }
+            threads[key]['comments'].append(comment)
+        return threads
+
+    def get_followers(self):
+        """The followers of all the threads, ordered by email so that the threads of a follower come together"""
+        object_ids = defaultdict(list)
+        for content_type_id, object_id in self.threads:
+            object_ids[content_type_id].append(object_id)
+        query = reduce(or_, (
+            Q(content_type_id=content_type_id, object_id__in=ids) for content_type_id, ids in object_ids.items()
+        ))
+        return Follower.objects.filter(query).order_by('email').values_list(
+            'email', 'username', 'content_type_id', 'object_id', named=True
+        ).iterator(chunk_size=settings.COMMENT_FOLLOWERS_CHUNK_SIZE)
+
+    def is_due(self, comment, email):
+        return comment.email != email and (comment.id not in self.receivers or email in self.receivers[comment.id])
+
+    def get_digests(self):
+        """The email and username of each follower with the threads, and their comments, to notify them about"""
+        for email, follows in groupby(self.get_followers(), key=attrgetter('email')):
+            follows = list(follows)
+            threads = []
+            for follow in follows:
+                thread = self.threads[(follow.content_type_id, follow.object_id)]
+                comments = [comment for comment in thread['comments'] if self.is_due(comment, email)]
+                if comments:
+                    threads.append({**thread, 'comments': comments})
+            if threads:
+                yield email, follows[0].username, threads
+
+    def get_messages_for_digest(self):
+        text_template = 'comment/notifications/digest.txt'
+        html_template = 'comment/notifications/digest.html'
+        context = self.get_msg_context()
+        for email, username, threads in self.get_digests():
+            text_msg, html_msg = self.get_message_templates(
+                text_template, html_template, {**context, 'receiver': username, 'threads': threads}
+            )
+            yield self.get_message(EmailInfo.DIGEST_SUBJECT, text_msg, [email], html_msg=html_msg)
+
+    def get_unsent_digests(self):
+        """The email of each follower not notified yet with the ids of the comments due to them"""
+        for email, _, threads in self.get_digests():
+            if email not in self.notified:
+                yield email, [comment.id for thread in threads for comment in thread['comments']]
+
+    def send_messages(self, messages):
+        super().send_messages(messages)
+        self.notified.update(receiver for message in messages for receiver in message.to)
+
+    def send_digest(self):
+        if self.threads:
+            self.send_messages_in_chunks(self.get_messages_for_digest())
+
+
+def send_comment_digests():
+    """
+    Send the digest of the comments stored since the last one. Returns the number of comments in the digest.
+
+    The comments are removed from the outbox before sending, outside of the transaction holding their locks, so that
+    no follower gets the same comments twice. When the mail connection cannot be opened the comments are kept for the
+    next digest, when sending fails part way they are stored again for the followers not reached yet.
+    """
+    with get_connection() as connection:
+        with transaction.atomic():
+            pending = list(OutboxEmail.objects.lock_digests().select_related(
+                'comment__user', 'comment__parent', 'comment__content_type'
+            ).prefetch_related('comment__content_object'))
+            OutboxEmail.objects.filter(id__in=[email.id for email in pending]).delete()
+        comments = {email.comment_id: email.comment for email in pending}
+        if comments:
+            broadcast = {email.comment_id for email in pending if not email.receiver}
+            receivers = defaultdict(set)
+            for email in pending:
+                if email.comment_id not in broadcast:
+                    receivers[email.comment_id].add(email.receiver)
+            service = DABDigestService(
+                list(comments.values()), pending[-1].get_request(), connection=connection, receivers=receivers
+            )
+            try:
+                service.send_digest()
+            except Exception as error:
+                OutboxEmail.objects.retry_digest(pending, service.get_unsent_digests(), error)
+                raise
+    return len(comments)
@@ -1,23 +1,27 @@
-from threading import Thread
+from itertools import islice
+from uuid import uuid4
 
 from django.contrib.sites.shortcuts import get_current_site
 from django.core import signing
-from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail import EmailMultiAlternatives
 from django.template import loader
 from django.urls import reverse
+from django.utils.html import escape
 
 from comment.conf import settings
 from comment.messages import EmailInfo
-from comment.models import Follower
+from comment.models import Follower, OutboxEmail
+from comment.service.delivery import email_delivery
 
 
 class DABEmailService(object):
-    def __init__(self, comment, request):
+    def __init__(self, comment, request, connection=None):
         self.comment = comment
         self.request = request
+        # messages are sent right away over this connection if given, otherwise they are queued for delivery
+        self.connection = connection
         self.sender = settings.COMMENT_FROM_EMAIL
         self.is_html = settings.COMMENT_SEND_HTML_EMAIL
-        self._email_thread = None
 
     def get_msg_context(self, **context):
         context['comment'] = self.comment
@@ -32,9 +36,18 @@ class DABEmailService(object):
         return msg
 
     def send_messages(self, messages):
-        connection = get_connection()  # Use default email connection
-        self._email_thread = Thread(target=connection.send_messages, args=(messages,))
-        self._email_thread.start()
+        if self.connection:
+            self.connection.send_messages(messages)
+        else:
+            email_delivery.send(messages)
+
+    def send_messages_in_chunks(self, messages):
+        """Send the messages generated by an iterator, a chunk of `COMMENT_FOLLOWERS_CHUNK_SIZE` at a time"""
+        chunk_size = settings.COMMENT_FOLLOWERS_CHUNK_SIZE
+        chunk = list(islice(messages, chunk_size))
+        while chunk:
+            self.send_messages(chunk)
+            chunk = list(islice(messages, chunk_size))
 
     def get_message_templates(self, text_template, html_template, msg_context):
         text_msg_template = loader.get_template(text_template)
@@ -45,10 +58,41 @@ class DABEmailService(object):
             html_msg = html_msg_template.render(msg_context)
         return text_msg, html_msg
 
+    @staticmethod
+    def _replace_placeholder(messages, placeholder, value):
+        return tuple(
+            msg.replace(escape(placeholder), escape(value)).replace(placeholder, value) if msg else msg
+            for msg in messages
+        )
+
+    def get_receiver_message_templates(self, text_template, html_template, msg_context):
+        """
+        Return a function rendering the message templates for a username, as the `receiver` in the context.
+        The templates are rendered once with a placeholder as the receiver, which is then replaced by each username.
+        Templates that alter the receiver, e.g. with a filter, are detected by rendering a second placeholder and are
+        rendered for each username instead.
+        """
+        placeholder, control = ('<{}>'.format(uuid4().hex) for _ in range(2))
+        rendered = self.get_message_templates(text_template, html_template, {**msg_context, 'receiver': placeholder})
+        control_rendered = self.get_message_templates(
+            text_template, html_template, {**msg_context, 'receiver': control}
+        )
+        if self._replace_placeholder(rendered, placeholder, control) == control_rendered:
+            return lambda username: self._replace_placeholder(rendered, placeholder, username)
+
+        return lambda username: self.get_message_templates(
+            text_template, html_template, {**msg_context, 'receiver': username}
+        )
+
     def send_confirmation_request(self, api=False):
-        comment_dict = self.comment.to_dict()
-        receivers = [comment_dict['email']]
-        key = signing.dumps(comment_dict, compress=True)
+        key = signing.dumps(self.comment.to_dict(), compress=True)
+        if settings.COMMENT_EMAIL_USE_OUTBOX:
+            OutboxEmail.objects.add_confirmation(key, self.request, api=api)
+            return
+        self.deliver_confirmation_request(key, api=api)
+
+    def deliver_confirmation_request(self, key, api=False):
+        receivers = [self.comment.email]
         text_template = 'comment/anonymous/confirmation_request.txt'
         html_template = 'comment/anonymous/confirmation_request.html'
         subject = EmailInfo.CONFIRMATION_SUBJECT
@@ -77,21 +121,32 @@ class DABEmailService(object):
         return EmailInfo.NOTIFICATION_SUBJECT.format(username=username, thread_name=thread_name)
 
     def get_messages_for_notification(self, thread_name, receivers):
+        """Generate the notification message for each receiver, rendering the templates once a receiver is reached"""
         text_template = 'comment/notifications/notification.txt'
         html_template = 'comment/notifications/notification.html'
-        subject = self.get_subject_for_notification(thread_name)
-        messages = []
+        render = None
         for receiver in receivers:
-            context = self.get_msg_context(thread_name=thread_name, receiver=receiver.username)
-            text_msg, html_msg = self.get_message_templates(text_template, html_template, context)
-            messages.append(self.get_message(subject, text_msg, [receiver.email], html_msg=html_msg))
-        return messages
+            if render is None:
+                subject = self.get_subject_for_notification(thread_name)
+                context = self.get_msg_context(thread_name=thread_name)
+                render = self.get_receiver_message_templates(text_template, html_template, context)
+            text_msg, html_msg = render(receiver.username)
+            yield self.get_message(subject, text_msg, [receiver.email], html_msg=html_msg)
 
     def send_notification_to_followers(self):
-        thread = self.get_thread()
-        followers = Follower.objects.filter_for_model_object(thread).exclude(email=self.comment.email)
-        if not followers:
+        if settings.COMMENT_NOTIFICATION_DIGEST:
+            OutboxEmail.objects.add_digest(self.comment, self.request)
+            return
+        if settings.COMMENT_EMAIL_USE_OUTBOX:
+            OutboxEmail.objects.add_notification(self.comment, self.request)
             return
-        thread_name = self.get_thread_name()
-        messages = self.get_messages_for_notification(thread_name, followers)
-        self.send_messages(messages)
+        self.deliver_notification_to_followers()
+
+    def deliver_notification_to_followers(self):
+        """Stream the followers of the thread in chunks, sending the messages of each chunk before loading the next"""
+        chunk_size = settings.COMMENT_FOLLOWERS_CHUNK_SIZE
+        thread = self.get_thread()
+        followers = Follower.objects.filter_for_model_object(thread).exclude(
+            email=self.comment.email
+        ).values_list('email', 'username', named=True).iterator(chunk_size=chunk_size)
+        self.send_messages_in_chunks(self.get_messages_for_notification(self.get_thread_name(), followers))
@@ -0,0 +1,50 @@
+from django.core.mail import get_connection
+from django.db import transaction
+
+from comment.conf import settings
+from comment.models import OutboxEmail
+from comment.service.email import DABEmailService
+from comment.utils import get_comment_from_key
+
+
+def deliver_outbox_email(email, connection):
+    request = email.get_request()
+    if email.kind == OutboxEmail.NOTIFICATION:
+        DABEmailService(email.comment, request, connection=connection).deliver_notification_to_followers()
+        return
+
+    temp_comment = get_comment_from_key(email.confirmation_key)
+    # nothing to send for a comment that has been confirmed meanwhile
+    if temp_comment.is_valid:
+        DABEmailService(temp_comment.obj, request, connection=connection).deliver_confirmation_request(
+            email.confirmation_key, api=email.api
+        )
+
+
+def send_outbox_emails(batch_size=None):
+    """
+    Send a batch of the pending outbox emails over a single connection.
+    Sent emails are deleted, failed ones are retried later. Returns the numbers of sent and failed emails.
+    """
+    batch_size = batch_size or settings.COMMENT_OUTBOX_BATCH_SIZE
+    sent = []
+    failed = 0
+    connection = get_connection()
+    try:
+        with transaction.atomic():
+            for email in OutboxEmail.objects.lock_pending(batch_size).select_related('comment'):
+                try:
+                    with transaction.atomic():
+                        # an explicitly opened connection is kept open by the backend for the next emails
+                        connection.open()
+                        deliver_outbox_email(email, connection)
+                except Exception as e:
+                    connection.close()
+                    email.retry_later(e)
+                    failed += 1
+                else:
+                    sent.append(email.id)
+            OutboxEmail.objects.filter(id__in=sent).delete()
+    finally:
+        connection.close()
+    return len(sent), failed
@@ -1,7 +1,8 @@
 from django.dispatch import receiver
+from django.db import transaction
 from django.db.models import signals
 
-from comment.models import FlagInstance, ReactionInstance
+from comment.models import Comment, CommentCounter, Flag, FlagInstance, ReactionInstance, BlockedUser
 
 
 @receiver(signals.post_delete, sender=FlagInstance)
@@ -14,3 +15,26 @@ def decrease_count(sender, instance, using, **kwargs):
 @receiver(signals.post_delete, sender=ReactionInstance)
 def delete_reaction_instance(sender, instance, using, **kwargs):
     instance.reaction.decrease_reaction_count(instance.reaction_type)
+
+
+@receiver(signals.post_delete, sender=Comment)
+def decrease_comment_counts(sender, instance, using, **kwargs):
+    CommentCounter.objects.decrease_count(instance)
+    if instance.parent_id:
+        Comment.objects.decrease_reply_count(instance)
+
+
+@receiver(signals.post_delete, sender=Flag)
+def decrease_flagged_counts(sender, instance, using, **kwargs):
+    if instance.state != instance.FLAGGED:
+        return
+    comment = instance.comment
+    CommentCounter.objects.refresh_flagged_count(comment)
+    if comment.parent_id:
+        Comment.objects.refresh_flagged_reply_count(comment.parent_id)
+
+
+@receiver(signals.post_delete, sender=BlockedUser)
+def invalidate_blocked_users_cache(sender, instance, using, **kwargs):
+    BlockedUser.objects.invalidate_cache()
+    transaction.on_commit(BlockedUser.objects.invalidate_cache, using=using)
@@ -2,7 +2,7 @@ from django.contrib.auth.models import Permission, Group
 from django.contrib.contenttypes.models import ContentType
 
 from comment.conf import settings
-from comment.models import Comment
+from comment.models import Comment, Flag
 
 
 def create_permission_groups(sender, **kwargs):
@@ -26,7 +26,4 @@ def create_permission_groups(sender, **kwargs):
 
 
 def adjust_flagged_comments(sender, **kwargs):
-    [
-        comment.flag.toggle_flagged_state()
-        for comment in Comment.objects.all()
-    ]
+    Flag.objects.refresh_states()
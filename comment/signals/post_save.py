@@ -1,7 +1,10 @@
 from django.dispatch import receiver
+from django.db import transaction
 from django.db.models import signals
 
-from comment.models import Comment, Flag, FlagInstance, Reaction, ReactionInstance, Follower
+from comment.models import (
+    Comment, Flag, FlagInstance, Reaction, ReactionInstance, Follower, CommentCounter, BlockedUser
+)
 from comment.conf import settings
 
 
@@ -14,6 +17,25 @@ def add_initial_instances(sender, instance, created, raw, using, update_fields,
             Follower.objects.follow_parent_thread_for_comment(comment=instance)
 
 
+@receiver(signals.post_save, sender=Comment)
+def increase_comment_counts(sender, instance, created, raw, using, update_fields, **kwargs):
+    if created:
+        CommentCounter.objects.increase_count(instance)
+        if instance.parent_id:
+            Comment.objects.increase_reply_count(instance)
+
+
+@receiver(signals.post_save, sender=Flag)
+def update_flagged_counts(sender, instance, created, raw, using, update_fields, **kwargs):
+    """Recount the flagged comments of the thread whenever the flag state may have changed"""
+    if created or (update_fields and 'state' not in update_fields):
+        return
+    comment = instance.comment
+    CommentCounter.objects.refresh_flagged_count(comment)
+    if comment.parent_id:
+        Comment.objects.refresh_flagged_reply_count(comment.parent_id)
+
+
 @receiver(signals.post_save, sender=FlagInstance)
 def increase_count(sender, instance, created, raw, using, update_fields, **kwargs):
     if created:
@@ -25,3 +47,10 @@ def increase_count(sender, instance, created, raw, using, update_fields, **kwarg
 def add_count(sender, instance, created, raw, using, update_fields, **kwargs):
     if created:
         instance.reaction.increase_reaction_count(instance.reaction_type)
+
+
+@receiver(signals.post_save, sender=BlockedUser)
+def invalidate_blocked_users_cache(sender, instance, created, raw, using, update_fields, **kwargs):
+    """Drop the cached blocking states, again after commit to discard states read before it"""
+    BlockedUser.objects.invalidate_cache()
+    transaction.on_commit(BlockedUser.objects.invalidate_cache, using=using)
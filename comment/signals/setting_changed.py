@@ -0,0 +1,6 @@
+from comment.utils import clear_profile_cache
+
+
+def reset_profile_cache(sender, setting, **kwargs):
+    if setting in {'PROFILE_APP_NAME', 'PROFILE_MODEL_NAME', 'INSTALLED_APPS'}:
+        clear_profile_cache()
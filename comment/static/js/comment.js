@@ -56,7 +56,30 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // show and hide child comments
     let replyLink = replyLinkElement => {
-        getNthParent(replyLinkElement, 4).nextElementSibling.classList.toggle('d-none');
+        let repliesElement = getNthParent(replyLinkElement, 4).nextElementSibling;
+        if (repliesElement.hasAttribute('data-url')) {
+            loadReplies(repliesElement);
+        }
+        repliesElement.classList.toggle('d-none');
+    };
+
+    // fetch the replies of a parent comment when they are loaded on demand
+    let loadReplies = repliesElement => {
+        let url = repliesElement.getAttribute('data-url');
+        repliesElement.removeAttribute('data-url');
+        fetch(url, {headers: headers}).then(response => {
+            return response.json();
+        }).then(result => {
+            if (result.status === 403) {
+                alert(result.reason);
+                return;
+            }
+            repliesElement.insertAdjacentHTML('afterbegin', result.data);
+        }).catch((error) => {
+            repliesElement.setAttribute('data-url', url);
+            alert(gettext("Unable to load the replies, please try again"));
+            console.error(error);
+        });
     };
 
     // resize the input field according to typed text
@@ -175,6 +198,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const urlParams = new window.URLSearchParams(window.location.search);
         let formData = serializeObject(form);
         formData.page = urlParams.get('page');
+        formData.cursor = urlParams.get('cursor');
         // this step is needed to append the form data to request.POST
         let formDataQuery = convertFormDataToURLQuery(formData);
         let emailRequired = formButton.getAttribute('data-email-required') === 'true';
@@ -356,6 +380,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // get the current page number and send it to pagination func
         let currentURL = window.location.href.split("=")[1];
         formData['page'] = parseInt(currentURL, 10);
+        formData['cursor'] = new window.URLSearchParams(window.location.search).get('cursor');
         let isParent = formData.isParent === "True";
 
         let formDataQuery = convertFormDataToURLQuery(formData);
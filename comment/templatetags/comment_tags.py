@@ -1,16 +1,19 @@
+import hashlib
 import re
+import threading
 import warnings
 
 from django import template
+from django.core.cache import caches
 from django.utils.html import conditional_escape
 from django.utils.safestring import mark_safe
 from django.core.exceptions import ImproperlyConfigured
 
-from comment.models import ReactionInstance, FlagInstance, Follower, BlockedUser
+from comment.models import ReactionInstance, FlagInstance, Follower, BlockedUser, CommentCounter
 from comment.forms import CommentForm
 from comment.utils import (
     is_comment_moderator, is_comment_admin, get_gravatar_img, get_profile_instance, get_wrapped_words_number,
-    can_block_user
+    can_block_user, get_user_state, get_profile_image_field
 )
 from comment.managers import FlagInstanceManager
 from comment.messages import ReactionError
@@ -20,6 +23,7 @@ from comment.conf import settings
 
 MULTIPLE_NEW_LINE_RE = re.compile(r'(.*)(\n){2,}(.*)')
 SINGLE_NEW_LINE_RE = re.compile(r'(.*)(\n)(.*)')
+_markdown_renderers = threading.local()
 register = template.Library()
 
 
@@ -57,25 +61,25 @@ def get_img_path(obj):
     profile = get_profile_instance(obj.user)
     if not profile:
         return get_gravatar_img(obj.email)
-    for field in profile.__class__._meta.get_fields():
-        if hasattr(field, 'upload_to'):
-            return field.value_from_object(profile).url
+    image_field = get_profile_image_field()
+    if image_field:
+        return getattr(profile, image_field).url
     return get_gravatar_img(obj.email)
 
 
 @register.simple_tag(name='get_comments_count')
 def get_comments_count(obj, user):
-    return obj.comments.all_comments_by_object(obj, include_flagged=is_comment_moderator(user)).count()
+    return CommentCounter.objects.get_count_for_object(obj, include_flagged=is_comment_moderator(user))
 
 
 @register.simple_tag(name='get_comment_replies')
 def get_comment_replies(comment, user):
-    return comment.replies(include_flagged=is_comment_moderator(user))
+    return comment.get_replies(include_flagged=is_comment_moderator(user))
 
 
 @register.simple_tag(name='get_replies_count')
 def get_replies_count(comment, user):
-    return comment.replies(include_flagged=is_comment_moderator(user)).count()
+    return comment.get_replies_count(include_flagged=is_comment_moderator(user))
 
 
 def render_comments(obj, request, oauth=False):
@@ -100,7 +104,18 @@ def _restrict_line_breaks(content):
     return SINGLE_NEW_LINE_RE.sub(r'\1<br>\3', content)
 
 
-def _render_markdown(content):
+def _get_markdown_renderer():
+    """
+    Return the `Markdown` instance of the current thread, `Markdown` instances are not thread safe.
+    It is built once for the markdown settings in use, since loading the extensions is costly, and rebuilt when they
+    change.
+    """
+    extensions = list(settings.COMMENT_MARKDOWN_EXTENSIONS)
+    extension_configs = dict(settings.COMMENT_MARKDOWN_EXTENSION_CONFIG)
+    renderer = getattr(_markdown_renderers, 'renderer', None)
+    if renderer and _markdown_renderers.config == (extensions, extension_configs):
+        return renderer.reset()
+
     try:
         import markdown as md
     except ModuleNotFoundError:
@@ -109,12 +124,48 @@ def _render_markdown(content):
             'You can install it by visting https://pypi.org/p/markdown or by using the command '
             '"python -m pip install django-comments-dab[markdown]".'
         )
-    else:
-        return md.markdown(
-            conditional_escape(content),
-            extensions=settings.COMMENT_MARKDOWN_EXTENSIONS,
-            extension_config=settings.COMMENT_MARKDOWN_EXTENSION_CONFIG
-        )
+    _markdown_renderers.renderer = md.Markdown(extensions=extensions, extension_configs=extension_configs)
+    _markdown_renderers.config = (extensions, extension_configs)
+    return _markdown_renderers.renderer
+
+
+def _render_markdown(content):
+    return _get_markdown_renderer().convert(conditional_escape(content))
+
+
+def _render_text(comment, number, markdown):
+    if markdown:
+        return _render_markdown(comment.content), ''
+
+    # this is necessary to avoid XSS attacks
+    escaped_content = conditional_escape(comment.content)
+    content = _restrict_line_breaks(escaped_content)
+    content_words = content.split()
+    if not number or len(content_words) <= number:
+        return content, None
+    return ' '.join(content_words[:number]), ' '.join(content_words[number:])
+
+
+def _get_content_cache_key(comment, number, markdown):
+    options = str(number)
+    if markdown:
+        markdown_config = repr((settings.COMMENT_MARKDOWN_EXTENSIONS, settings.COMMENT_MARKDOWN_EXTENSION_CONFIG))
+        options = 'md:' + hashlib.md5(markdown_config.encode()).hexdigest()
+    # editing a comment updates `edited`, hence the content is re-rendered after each edit
+    return 'comment:content:{}:{}:{}'.format(comment.pk, comment.edited.timestamp(), options)
+
+
+def _get_rendered_text(comment, number, markdown):
+    if not settings.COMMENT_CACHE_RENDERED_CONTENT or not comment.pk or not comment.edited:
+        return _render_text(comment, number, markdown)
+
+    cache = caches[settings.COMMENT_CACHE_ALIAS]
+    key = _get_content_cache_key(comment, number, markdown)
+    text = cache.get(key)
+    if text is None:
+        text = _render_text(comment, number, markdown)
+        cache.set(key, text, settings.COMMENT_RENDERED_CONTENT_CACHE_TIMEOUT)
+    return text
 
 
 def render_content(comment, number=None, **kwargs):
@@ -128,31 +179,17 @@ def render_content(comment, number=None, **kwargs):
                 ),
                 RuntimeWarning,
             )
-        return {
-            'text_1': mark_safe(_render_markdown(comment.content)),
-            'text_2': '',
-            'urlhash': comment.urlhash,
-        }
-
-    try:
-        number = int(number)
-    except (ValueError, TypeError):
-        number = get_wrapped_words_number()
-
-    # this is necessary to avoid XSS attacks
-    escaped_content = conditional_escape(comment.content)
-    content = _restrict_line_breaks(escaped_content)
-    content_words = content.split()
-    if not number or len(content_words) <= number:
-        text_1 = content
-        text_2 = None
+        number = None
     else:
-        text_1 = ' '.join(content_words[:number])
-        text_2 = ' '.join(content_words[number:])
+        try:
+            number = int(number)
+        except (ValueError, TypeError):
+            number = get_wrapped_words_number()
 
+    text_1, text_2 = _get_rendered_text(comment, number, markdown)
     return {
         'text_1': mark_safe(text_1),
-        'text_2': mark_safe(text_2) if text_2 else None,
+        'text_2': mark_safe(text_2) if text_2 else text_2,
         'urlhash': comment.urlhash
     }
 
@@ -171,9 +208,10 @@ def can_block_users_tag(user):
 
 
 @register.filter(name='is_user_blocked')
-def is_user_blocked(comment):
-    user_id = comment.user.id if comment.user else None
-    return BlockedUser.objects.is_user_blocked(user_id, comment.email)
+def is_user_blocked(comment, blocked_status=None):
+    if blocked_status and comment.id in blocked_status:
+        return blocked_status[comment.id]
+    return BlockedUser.objects.is_user_blocked(comment.user_id, comment.email)
 
 
 # TODO: remove in v3.0.0
@@ -213,6 +251,9 @@ def has_reacted(comment, user, reaction):
         reaction_type = getattr(ReactionInstance.ReactionType, reaction.upper(), None)
         if not reaction_type:
             raise template.TemplateSyntaxError(ReactionError.TYPE_INVALID.format(reaction_type=reaction))
+        state = get_user_state(comment, user)
+        if state and 'reaction' in state:
+            return state['reaction'] == reaction_type.value
         return ReactionInstance.objects.filter(
             user=user,
             reaction_type=reaction_type.value,
@@ -225,6 +266,9 @@ def has_reacted(comment, user, reaction):
 @register.filter(name='has_flagged')
 def has_flagged(user, comment):
     if user.is_authenticated:
+        state = get_user_state(comment, user)
+        if state and 'flagged' in state:
+            return state['flagged']
         return FlagInstance.objects.filter(user=user, flag__comment=comment).exists()
 
     return False
@@ -233,6 +277,9 @@ def has_flagged(user, comment):
 @register.filter(name='has_followed')
 def has_followed(user, model_object):
     if user.is_authenticated:
+        state = get_user_state(model_object, user)
+        if state and 'followed' in state:
+            return state['followed']
         return Follower.objects.is_following(user.email, model_object)
     return False
 
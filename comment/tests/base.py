@@ -9,6 +9,7 @@ from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.db import connection
 from django.db.migrations.executor import MigrationExecutor
 from django.test import TestCase, RequestFactory, TransactionTestCase, Client
@@ -61,6 +62,11 @@ class BaseCommentTest(TestCase, BaseInternationalizationTest):
     increment = 0
     user_1 = None
 
+    @staticmethod
+    def run_on_commit():
+        """Run `transaction.on_commit` callbacks right away, the transaction of a test case is never committed"""
+        return patch('django.db.transaction.on_commit', side_effect=lambda func, using=None: func())
+
     @classmethod
     def setUpTestData(cls):
         super().setUpTestData()
@@ -111,6 +117,8 @@ class BaseCommentTest(TestCase, BaseInternationalizationTest):
 
     def setUp(self):
         super().setUp()
+        # cached states would outlive the rollback of the test data
+        caches[settings.COMMENT_CACHE_ALIAS].clear()
         self.client.force_login(self.user_1)
         translation.activate("test")
         self.addCleanup(patch.stopall)
@@ -11,6 +11,7 @@ from comment.api.serializers import get_profile_model, get_user_fields, UserSeri
     CommentSerializer
 from comment.tests.test_api.test_views import BaseAPITest
 from comment.messages import EmailError
+from comment.service.delivery import email_delivery
 
 
 class APICommentSerializersTest(BaseAPITest):
@@ -104,11 +105,11 @@ class APICommentSerializersTest(BaseAPITest):
         Follower.objects.follow('e@e.com', 'testUser', self.comment_1)
 
         serializer = CommentCreateSerializer(context=data)
-        comment = serializer.create(validated_data={'content': 'test'})
-        self.assertTrue(serializer.email_service._email_thread.is_alive)
+        with self.run_on_commit():
+            comment = serializer.create(validated_data={'content': 'test'})
         self.assertIsNotNone(comment)
-        self.assertIsNotNone(serializer.email_service._email_thread)
-        serializer.email_service._email_thread.join()
+        self.assertIsNotNone(serializer.email_service)
+        email_delivery.join()
         self.assertEqual(len(mail.outbox), 1)
 
     @patch.object(settings, 'COMMENT_ALLOW_ANONYMOUS', True)
@@ -134,8 +135,8 @@ class APICommentSerializersTest(BaseAPITest):
         self.assertIsNotNone(comment)
 
         # confirmation email is sent
-        self.assertIsNotNone(serializer.email_service._email_thread)
-        serializer.email_service._email_thread.join()
+        self.assertIsNotNone(serializer.email_service)
+        email_delivery.join()
         self.assertEqual(len(mail.outbox), 1)
 
     @patch.object(settings, 'COMMENT_ALLOW_ANONYMOUS', True)
@@ -2,6 +2,8 @@ from time import sleep
 from unittest.mock import patch
 
 from django.core import signing, mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse_lazy
 from rest_framework import status
 
@@ -11,8 +13,9 @@ from comment.managers import FlagInstanceManager
 from comment.messages import ContentTypeError, EmailError, ReactionError
 from comment.api.serializers import CommentSerializer
 from comment.utils import get_model_obj
-from comment.tests.base import BaseAPITest, timezone
+from comment.tests.base import BaseAPITest, User, timezone
 from comment.tests.test_utils import BaseAnonymousCommentTest
+from comment.service.delivery import email_delivery
 
 
 class BaseAPIViewTest(BaseAPITest):
@@ -58,6 +61,75 @@ class CommentListTest(BaseAPIViewTest):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), self.parents)
 
+    @patch('comment.api.serializers.get_profile_instance', return_value=None)
+    def test_query_count_does_not_grow_with_comments(self, _):
+        def create_thread():
+            parent = Comment.objects.create(content_object=self.post_1, content='parent', user=self.user_1)
+            reply = Comment.objects.create(content_object=self.post_1, content='reply', user=self.user_1, parent=parent)
+            self.create_reaction_instance(self.user_2, reply, 'like')
+            self.create_flag_instance(self.user_2, parent)
+
+        url = self.get_url(self.get_base_url(), **self.url_data)
+        create_thread()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        create_thread()
+        create_thread()
+
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data), self.parents + 3)
+        reply_data = response.data[0]['replies'][0]
+        self.assertEqual(reply_data['reactions']['users']['likes'], [{'id': self.user_2.id, 'username': 'username'}])
+        self.assertEqual(len(response.data[0]['flags']['reporters']), 1)
+
+    def test_profiles_are_loaded_with_the_comments(self):
+        def create_thread(index):
+            user = User.objects.create_user(username=f'author-{index}', email=f'author-{index}@test.com')
+            parent = Comment.objects.create(content_object=self.post_1, content='parent', user=user)
+            Comment.objects.create(content_object=self.post_1, content='reply', user=user, parent=parent)
+
+        url = self.get_url(self.get_base_url(), **self.url_data)
+        create_thread(1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        create_thread(2)
+        create_thread(3)
+
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertIsNotNone(response.data[0]['user']['profile'])
+        self.assertIsNotNone(response.data[0]['replies'][0]['user']['profile'])
+
+    @patch.object(settings, 'COMMENT_API_PAGE_SIZE', 2)
+    def test_cursor_pagination(self):
+        url = self.get_url(self.get_base_url(), **self.url_data)
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids.extend(comment['id'] for comment in response.data['results'])
+            url = response.data['next']
+
+        parents = Comment.objects.filter_parents_by_object(self.post_1)
+        self.assertGreater(parents.count(), 2)
+        self.assertEqual(ids, list(parents.order_by('-posted', '-id').values_list('id', flat=True)))
+
+    @patch.object(settings, 'COMMENT_API_PAGE_SIZE', 2)
+    @patch.object(settings, 'COMMENT_ORDER_BY', ['posted'])
+    def test_cursor_pagination_in_ascending_order(self):
+        response = self.client.get(self.get_url(self.get_base_url(), **self.url_data))
+
+        expected_ids = list(
+            Comment.objects.filter_parents_by_object(self.post_1).order_by('posted', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual([comment['id'] for comment in response.data['results']], expected_ids[:2])
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
     def test_retrieving_without_app_name(self):
         data = self.url_data.copy()
         data.pop('app_name')
@@ -658,11 +730,12 @@ class APIConfirmCommentViewTest(BaseAnonymousCommentTest, BaseAPITest):
 
     @patch.object(settings, 'COMMENT_ALLOW_SUBSCRIPTION', True)
     def test_success_with_notification(self):
-        response = self.client.get(self.get_base_url())
+        with self.run_on_commit():
+            response = self.client.get(self.get_base_url())
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-        response.renderer_context['view'].email_service._email_thread.join()
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 1)
 
@@ -2,12 +2,20 @@ from unittest.mock import patch
 
 from django.core.exceptions import ImproperlyConfigured
 from django.core.paginator import Page
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
 
 from comment.conf import settings
 
 from comment.tests.base import BaseCommentUtilsTest
-from comment.context import DABContext
+from comment.context import DABContext, RepliesContext
+from comment.templatetags.comment_tags import has_reacted, has_flagged, has_followed
+from comment.models import Comment
+from comment.pagination import CursorPage
 from comment.messages import ErrorMessage
+from comment.templatetags.comment_tags import render_comments
+from post.models import Post
 
 
 class DABContextTest(BaseCommentUtilsTest):
@@ -71,6 +79,127 @@ class DABContextTest(BaseCommentUtilsTest):
         self.assertEqual(context['comments'].paginator.per_page, 2)
         self.assertIsInstance(context['comments'], Page)
 
+    @patch.object(settings, 'COMMENT_USE_CURSOR_PAGINATION', True)
+    @patch.object(settings, 'COMMENT_PER_PAGE', 2)
+    def test_get_comments_with_cursor_pagination(self):
+        context = DABContext(self.request)
+        self.assertIsInstance(context['comments'], CursorPage)
+        self.assertEqual(len(context['comments']), 2)
+
+    @patch.object(settings, 'COMMENT_PER_PAGE', 2)
+    def test_get_comments_loads_replies_with_parents(self):
+        for _ in range(2):
+            Comment.objects.create(
+                content_object=self.content_object_1, content='reply', user=self.user_1, parent=self.comment_3
+            )
+        comments = DABContext(self.request).get_comments()
+        # a page of parents and the replies of all of them
+        with self.assertNumQueries(2):
+            parents = list(comments)
+
+        with self.assertNumQueries(0):
+            replies_count = [parent.get_replies_count() for parent in parents]
+        self.assertEqual(replies_count, [parent.replies().count() for parent in parents])
+
+    @patch.object(settings, 'COMMENT_LAZY_LOAD_REPLIES', True)
+    @patch.object(settings, 'COMMENT_PER_PAGE', 2)
+    def test_get_comments_without_replies(self):
+        Comment.objects.create(
+            content_object=self.content_object_1, content='reply', user=self.user_1, parent=self.comment_3
+        )
+        context = DABContext(self.request)
+        self.assertTrue(context['lazy_replies'])
+
+        comments = context.get_comments()
+        # only the page of parents is loaded, without their replies
+        with self.assertNumQueries(1):
+            parents = list(comments)
+        self.assertEqual(context._get_thread(parents), parents)
+
+    def test_replies_context(self):
+        reply = Comment.objects.create(
+            content_object=self.content_object_1, content='reply', user=self.user_1, parent=self.comment_3
+        )
+        parent = Comment.objects.filter_with_replies().get(id=self.comment_3.id)
+        context = RepliesContext(self.request, parent, comment=parent)
+
+        self.assertEqual(context['comment'], parent)
+        self.assertEqual(context['model_object'], self.content_object_1)
+        self.assertEqual(context['comments'], [parent])
+        self.assertEqual(context._get_thread(context['comments']), [parent, reply])
+
+    @patch.object(settings, 'COMMENT_ALLOW_BLOCKING_USERS', True)
+    @patch.object(settings, 'COMMENT_PER_PAGE', 2)
+    def test_get_blocked_status_for_blockers(self):
+        self.request.user = self.admin
+        context = DABContext(self.request)
+
+        self.assertTrue(context['blocked_status'])
+        for comment in context['comments']:
+            self.assertIs(context['blocked_status'][comment.id], False)
+
+    @patch.object(settings, 'COMMENT_ALLOW_BLOCKING_USERS', True)
+    def test_get_blocked_status_for_other_users(self):
+        self.request.user = self.user_2
+        self.assertEqual(DABContext(self.request)['blocked_status'], {})
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    @patch.object(settings, 'COMMENT_ALLOW_SUBSCRIPTION', True)
+    @patch.object(settings, 'COMMENT_PER_PAGE', 10)
+    def test_follow_state_of_comments_by_other_users(self):
+        post = Post.objects.create(author=self.user_1, title='follow state', body='body')
+        self.request = self.factory.get('/')
+        self.request.user = self.user_2
+
+        def render():
+            return render_to_string('comment/base.html', render_comments(post, self.request), request=self.request)
+
+        Comment.objects.create(content_object=post, content='parent', user=self.user_1)
+        render()
+        with CaptureQueriesContext(connection) as context:
+            render()
+        for _ in range(9):
+            Comment.objects.create(content_object=post, content='parent', user=self.user_1)
+
+        with self.assertNumQueries(len(context.captured_queries)):
+            html = render()
+
+        parents = render_comments(post, self.request)['comments']
+        with self.assertNumQueries(0):
+            for parent in parents:
+                self.assertIn('followBtn-{}'.format(parent.id), html)
+                self.assertFalse(has_followed(self.user_2, parent))
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    @patch.object(settings, 'COMMENT_ALLOW_SUBSCRIPTION', True)
+    @patch.object(settings, 'COMMENT_PER_PAGE', 0)
+    def test_user_state_attached_to_comments(self):
+        user = self.post_1.author
+        parent = Comment.objects.create(content_object=self.content_object_1, content='parent', user=user)
+        reply = Comment.objects.create(content_object=self.content_object_1, content='reply', user=user, parent=parent)
+        self.create_reaction_instance(user, reply, 'like')
+        self.create_flag_instance(user, parent)
+        context = DABContext(self.request)
+        parent = next(comment for comment in context['comments'] if comment.id == parent.id)
+        reply = parent.get_replies()[0]
+
+        with self.assertNumQueries(0):
+            self.assertTrue(has_reacted(reply, user, 'like'))
+            self.assertFalse(has_reacted(reply, user, 'dislike'))
+            self.assertFalse(has_reacted(parent, user, 'like'))
+            self.assertTrue(has_flagged(user, parent))
+            self.assertFalse(has_flagged(user, reply))
+            # the author follows the thread of the comment and the model object on creation
+            self.assertTrue(has_followed(user, parent))
+            self.assertTrue(has_followed(user, context['model_object']))
+
+    def test_user_state_for_other_users_is_ignored(self):
+        parent = Comment.objects.create(content_object=self.content_object_1, content='parent', user=self.user_1)
+        DABContext(self.request)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(has_reacted(parent, self.user_2, 'like'))
+
     def test_context_object_is_callable(self):
         context = DABContext(self.request)
         self.assertTrue(callable(context))
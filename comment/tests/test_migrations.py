@@ -16,7 +16,7 @@ class CommentMigrationTest(BaseCommentMigrationTest):
         self.instance += 1
 
         return self.old_model.objects.create(
-            content_type_id=self.ct_object.id,
+            content_type_id=ContentType.objects.get_for_model(self.ct_object).id,
             object_id=self.instance,
             content=f'test migration - {self.instance}',
             user_id=self.user.id,
@@ -33,6 +33,61 @@ class CommentMigrationTest(BaseCommentMigrationTest):
         self.assertEqual(comment.email, comment.user.email)
 
 
+class CommentCountersMigrationTest(BaseCommentMigrationTest):
+    migrate_from = '0012_blockeduser_blockeduserhistory'
+    migrate_to = '0013_comment_counters'
+
+    def create_comment(self, parent=None):
+        self.instance += 1
+        return self.old_model.objects.create(
+            content_type_id=ContentType.objects.get_for_model(self.post).id,
+            object_id=self.post.id,
+            content=f'test migration - {self.instance}',
+            user_id=self.user.id,
+            urlhash=f'comment-{self.instance}',
+            parent=parent,
+        )
+
+    def setUpBeforeMigration(self):
+        self.instance = 0
+        self.parent = self.create_comment()
+        self.create_comment(parent=self.parent)
+        self.create_comment(parent=self.parent)
+
+    def test_counts_are_populated(self):
+        parent = self.new_model.objects.get(id=self.parent.id)
+        counter = self.new_apps.get_model(self.app, 'CommentCounter').objects.get(object_id=self.post.id)
+
+        self.assertEqual(parent.reply_count, 2)
+        self.assertEqual(parent.flagged_reply_count, 0)
+        self.assertEqual(counter.comment_count, 3)
+        self.assertEqual(counter.flagged_count, 0)
+
+
+class UniqueFollowerMigrationTest(BaseCommentMigrationTest):
+    migrate_from = '0015_outboxemail'
+    migrate_to = '0016_unique_follower'
+
+    def setUpBeforeMigration(self):
+        follower_model = self.old_apps.get_model(self.app, 'Follower')
+        content_type_id = ContentType.objects.get_for_model(self.post).id
+        self.first = follower_model.objects.create(
+            email='a@a.com', username='a', content_type_id=content_type_id, object_id=self.post.id
+        )
+        follower_model.objects.create(
+            email='a@a.com', username='a', content_type_id=content_type_id, object_id=self.post.id
+        )
+        follower_model.objects.create(
+            email='b@b.com', username='b', content_type_id=content_type_id, object_id=self.post.id
+        )
+
+    def test_duplicate_followers_are_removed(self):
+        follower_model = self.new_apps.get_model(self.app, 'Follower')
+
+        self.assertEqual(follower_model.objects.count(), 2)
+        self.assertTrue(follower_model.objects.filter(id=self.first.id).exists())
+
+
 class GroupsAndPermissionsTest(TestCase):
     groups = [
         'comment_admin',
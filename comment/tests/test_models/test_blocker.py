@@ -1,6 +1,6 @@
 from unittest.mock import patch
 
-from comment.models import BlockedUser
+from comment.models import BlockedUser, Comment
 from comment.tests.base import BaseBlockerManagerTest
 from comment.conf import settings
 
@@ -61,3 +61,92 @@ class BlockerManagerTest(BaseBlockerManagerTest):
         mocked_get_or_create.side_effect = BlockedUser.MultipleObjectsReturned
         blocked_user, created = BlockedUser.objects._get_or_create_blocked_user_by_email('test@test.com')
         self.assertFalse(created)
+
+
+class BlockerManagerNoCacheTest(BaseBlockerManagerTest):
+    def test_state_is_not_cached_by_default(self):
+        self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+        self.assertIsNone(BlockedUser.objects._get_cache().get(BlockedUser.objects.cache_key_prefix + ':generation'))
+
+    def test_blocked_status_for_is_not_cached_by_default(self):
+        comment_by_blocked_user = Comment.objects.create(
+            content_object=self.post_1, content='blocked', user=self.blocked_user
+        )
+        comment_by_blocked_email = Comment.objects.create(
+            content_object=self.post_1, content='blocked email', email=self.blocked_email
+        )
+        comment_by_user = Comment.objects.create(content_object=self.post_1, content='not blocked', user=self.user_1)
+        expected = {comment_by_blocked_user.id: True, comment_by_blocked_email.id: True, comment_by_user.id: False}
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    BlockedUser.objects.blocked_status_for(
+                        [comment_by_blocked_user, comment_by_blocked_email, comment_by_user]
+                    ),
+                    expected
+                )
+
+
+@patch.object(settings, 'COMMENT_BLOCKED_USERS_CACHE_TIMEOUT', 300)
+class BlockerManagerCacheTest(BaseBlockerManagerTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.comment_by_blocked_user = Comment.objects.create(
+            content_object=cls.post_1, content='blocked', user=cls.blocked_user
+        )
+        cls.comment_by_user = Comment.objects.create(content_object=cls.post_1, content='not blocked', user=cls.user_1)
+        cls.comment_by_blocked_email = Comment.objects.create(
+            content_object=cls.post_1, content='blocked email', email=cls.blocked_email
+        )
+        cls.comment_by_email = Comment.objects.create(
+            content_object=cls.post_1, content='email', email='unblocked@test.com'
+        )
+
+    def test_state_is_cached(self):
+        self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+        self.assertTrue(BlockedUser.objects.is_user_blocked(email=self.blocked_email))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+            self.assertTrue(BlockedUser.objects.is_user_blocked(email=self.blocked_email))
+
+    def test_cache_invalidated_on_save(self):
+        self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+        self.blocked_user_by_id.blocked = False
+        self.blocked_user_by_id.save()
+
+        self.assertFalse(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+
+    def test_cache_invalidated_on_delete(self):
+        self.assertTrue(BlockedUser.objects.is_user_blocked(email=self.blocked_email))
+        self.blocked_user_by_email.delete()
+
+        self.assertFalse(BlockedUser.objects.is_user_blocked(email=self.blocked_email))
+
+    def test_blocked_status_for(self):
+        comments = [
+            self.comment_by_blocked_user, self.comment_by_user, self.comment_by_blocked_email, self.comment_by_email
+        ]
+        expected = {
+            self.comment_by_blocked_user.id: True,
+            self.comment_by_user.id: False,
+            self.comment_by_blocked_email.id: True,
+            self.comment_by_email.id: False,
+        }
+        with self.assertNumQueries(1):
+            self.assertEqual(BlockedUser.objects.blocked_status_for(comments), expected)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(BlockedUser.objects.blocked_status_for(comments), expected)
+            self.assertTrue(BlockedUser.objects.is_user_blocked(user_id=self.blocked_user.id))
+
+    @patch.object(settings, 'COMMENT_ALLOW_BLOCKING_USERS', False)
+    def test_blocked_status_for_when_system_disabled(self):
+        with self.assertNumQueries(0):
+            status = BlockedUser.objects.blocked_status_for([self.comment_by_blocked_user])
+
+        self.assertEqual(status, {self.comment_by_blocked_user.id: False})
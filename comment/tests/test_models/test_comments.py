@@ -1,11 +1,15 @@
 from time import sleep
 from unittest.mock import patch
 
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from comment.conf import settings
 from comment.models import Comment
+from comment.pagination import encode_cursor
 from comment.tests.base import BaseCommentManagerTest, RequestFactory
+from comment.utils import get_profile_instance
 
 
 class CommentModelTest(BaseCommentManagerTest):
@@ -73,6 +77,18 @@ class CommentModelTest(BaseCommentManagerTest):
         # the comment is hidden, since it is flagged.
         self.assertEqual(self.parent_comment_2.replies().count(), init_count - 1)
 
+    def test_get_replies_without_thread_loader(self):
+        self.assertQuerysetEqual(self.parent_comment_2.get_replies(), self.parent_comment_2.replies())
+        self.assertEqual(self.parent_comment_2.get_replies_count(), self.parent_comment_2.replies().count())
+
+    def test_get_replies_reads_prefetched_replies(self):
+        replies = list(self.parent_comment_2.replies())
+        parent = Comment.objects.filter_parents_with_replies(self.post_1).get(id=self.parent_comment_2.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(parent.get_replies(), replies)
+            self.assertEqual(parent.get_replies_count(), 3)
+
     @patch('comment.models.comments.hasattr')
     def test_is_flagged_property(self, mocked_hasattr):
         comment = self.create_comment(self.content_object_2)
@@ -139,6 +155,34 @@ class CommentModelTest(BaseCommentManagerTest):
         self.assertEqual(second_comment.urlhash, 'second_urlhash')
         self.assertEqual(mocked_generate_urlhash.call_count, 3)
 
+    @patch('comment.managers.CommentManager.generate_urlhash')
+    def test_urlhash_is_not_checked_before_insert(self, mocked_generate_urlhash):
+        mocked_generate_urlhash.return_value = 'unique_urlhash'
+
+        with CaptureQueriesContext(connection) as queries:
+            comment = self.create_comment(self.content_object_1)
+
+        self.assertEqual(comment.urlhash, 'unique_urlhash')
+        self.assertFalse(
+            any(query['sql'].startswith('SELECT') and 'urlhash' in query['sql'] for query in queries.captured_queries)
+        )
+
+    @patch.object(settings, 'COMMENT_URL_ID_MAX_ATTEMPTS', 3)
+    @patch('comment.managers.CommentManager.generate_urlhash')
+    def test_urlhash_attempts_are_limited(self, mocked_generate_urlhash):
+        mocked_generate_urlhash.return_value = self.parent_comment.urlhash
+
+        self.assertRaises(IntegrityError, self.create_comment, self.content_object_1)
+        self.assertEqual(mocked_generate_urlhash.call_count, 3)
+
+    @patch.object(settings, 'COMMENT_URL_ID_GENERATOR', Comment.objects.TIME_URLHASH)
+    def test_time_ordered_urlhash(self):
+        first_comment = self.create_comment(self.content_object_1)
+        second_comment = self.create_comment(self.content_object_1)
+
+        self.assertTrue(first_comment.urlhash.startswith(settings.COMMENT_URL_PREFIX))
+        self.assertLess(first_comment.urlhash, second_comment.urlhash)
+
     def test_comment_email(self):
         comment = self.parent_comment_1
 
@@ -233,6 +277,70 @@ class CommentModelManagerTest(BaseCommentManagerTest):
 
         self.assertEqual(count, init_count)
 
+    def test_filter_parents_with_replies(self):
+        parents_qs = Comment.objects.filter_parents_by_object(self.post_1)
+        # one query for the parents and one for the replies of all of them
+        with self.assertNumQueries(2):
+            parents = list(Comment.objects.filter_parents_with_replies(self.post_1))
+
+        self.assertEqual(parents, list(parents_qs))
+        with self.assertNumQueries(0):
+            for parent in parents:
+                for reply in parent.get_replies():
+                    self.assertEqual(reply.parent, parent)
+                    self.assertIsNotNone(reply.user)
+                    self.assertIsNotNone(reply.reaction)
+                    self.assertIsNotNone(reply.flag)
+
+        for parent in parents:
+            self.assertEqual(parent.get_replies(), list(parent.replies()))
+
+    def test_thread_loads_author_profiles(self):
+        parents = list(Comment.objects.filter_parents_with_replies(self.post_1))
+
+        with self.assertNumQueries(0):
+            for parent in parents:
+                self.assertIsNotNone(get_profile_instance(parent.user))
+                for reply in parent.get_replies():
+                    self.assertIsNotNone(get_profile_instance(reply.user))
+
+    @patch.object(settings, 'PROFILE_MODEL_NAME', None)
+    def test_thread_without_profile_model(self):
+        self.assertEqual(Comment.objects.get_related_lookups(), ['user', 'reaction', 'flag'])
+        parents = Comment.objects.filter_parents_with_replies(self.post_1)
+        self.assertEqual(len(parents), Comment.objects.filter_parents_by_object(self.post_1).count())
+
+    def test_filter_parents_without_replies(self):
+        with self.assertNumQueries(1):
+            parents = list(Comment.objects.filter_parents_without_replies(self.post_1))
+
+        self.assertEqual(parents, list(Comment.objects.filter_parents_by_object(self.post_1)))
+
+    def test_filter_with_replies(self):
+        replies = list(self.parent_comment_2.replies())
+        with self.assertNumQueries(2):
+            parent = Comment.objects.filter_with_replies().get(id=self.parent_comment_2.id)
+            self.assertEqual(parent.get_replies(), replies)
+
+        self.assertFalse(Comment.objects.filter_with_replies().filter(id=self.child_comment_2.id).exists())
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    @patch.object(settings, 'COMMENT_SHOW_FLAGGED', False)
+    def test_filter_parents_with_replies_excludes_flagged_replies(self):
+        reply = self.child_comment_2
+        self.create_flag_instance(self.user_1, reply)
+        self.create_flag_instance(self.user_2, reply)
+
+        parent = Comment.objects.filter_parents_with_replies(self.post_1).get(id=self.parent_comment_2.id)
+        self.assertNotIn(reply, parent.get_replies())
+        self.assertEqual(parent.get_replies_count(), 2)
+
+        parent = Comment.objects.filter_parents_with_replies(
+            self.post_1, include_flagged=True
+        ).get(id=self.parent_comment_2.id)
+        self.assertIn(reply, parent.get_replies(include_flagged=True))
+        self.assertEqual(parent.get_replies_count(include_flagged=True), 3)
+
     @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
     @patch.object(settings, 'COMMENT_SHOW_FLAGGED', False)
     def test_get_parent_comment(self):
@@ -294,3 +402,23 @@ class GetUrlTest(BaseCommentManagerTest):
         comment = self.parent_comment_1
         comment_url = comment.content_object.get_absolute_url() + '?page=2' + '#' + comment.urlhash
         self.assertEqual(comment_url, comment.get_url(self.request))
+
+    @patch.object(settings, 'COMMENT_PER_PAGE', 3)
+    @patch.object(settings, 'COMMENT_USE_CURSOR_PAGINATION', True)
+    def test_cursor_pagination(self):
+        comment = self.parent_comment_1
+        content_object = comment.content_object
+        comment_url = '{}?cursor={}#{}'.format(
+            content_object.get_absolute_url(), encode_cursor(comment.posted, comment.id), comment.urlhash
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(comment_url, comment.get_url(self.request))
+
+    @patch.object(settings, 'COMMENT_PER_PAGE', 3)
+    @patch.object(settings, 'COMMENT_USE_CURSOR_PAGINATION', True)
+    def test_cursor_pagination_for_reply(self):
+        reply = self.child_comment_1
+        parent = reply.parent
+
+        self.assertIn('?cursor={}#'.format(encode_cursor(parent.posted, parent.id)), reply.get_url(self.request))
@@ -0,0 +1,77 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+
+from comment.conf import settings
+from comment.models import Comment, CommentCounter
+from comment.tests.base import BaseCommentManagerTest
+
+
+class CommentCounterModelTest(BaseCommentManagerTest):
+    def test_string_value(self):
+        counter = CommentCounter.objects.get(object_id=self.post_1.id)
+        self.assertEqual(str(counter), f'6 comments on {str(self.post_1)}')
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    @patch.object(settings, 'COMMENT_SHOW_FLAGGED', False)
+    def test_get_count(self):
+        counter = CommentCounter(comment_count=5, flagged_count=2)
+
+        self.assertEqual(counter.get_count(), 3)
+        self.assertEqual(counter.get_count(include_flagged=True), 5)
+        with patch.object(settings, 'COMMENT_SHOW_FLAGGED', True):
+            self.assertEqual(counter.get_count(), 5)
+
+
+class CommentCounterManagerTest(BaseCommentManagerTest):
+    def test_get_count_for_object(self):
+        self.assertEqual(
+            CommentCounter.objects.get_count_for_object(self.post_1),
+            Comment.objects.all_comments_by_object(self.post_1).count()
+        )
+
+    def test_get_count_for_object_without_comments(self):
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.user_1), 0)
+
+    def test_counter_created_concurrently(self):
+        comment = self.create_comment(self.content_object_1)
+        counter = CommentCounter.objects.get(object_id=self.post_1.id)
+        # the first update finds no counter while another request creates it in the meantime
+        with patch.object(CommentCounter.objects, '_filter_for_comment', side_effect=[
+            CommentCounter.objects.none(), CommentCounter.objects.filter(id=counter.id)
+        ]):
+            CommentCounter.objects.increase_count(comment)
+
+        counter.refresh_from_db()
+        self.assertEqual(counter.comment_count, 8)
+
+    def test_rebuild(self):
+        CommentCounter.objects.all().delete()
+        Comment.objects.update(reply_count=0)
+
+        CommentCounter.objects.rebuild()
+        Comment.objects.rebuild_reply_counts()
+
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.post_1), 6)
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.post_2), 4)
+        for comment in Comment.objects.all():
+            self.assertEqual(comment.reply_count, comment.replies(include_flagged=True).count())
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_rebuild_counts_flagged_comments(self):
+        self.create_flag_instance(self.user_1, self.child_comment_2)
+        self.create_flag_instance(self.user_2, self.child_comment_2)
+        CommentCounter.objects.update(flagged_count=0)
+        Comment.objects.update(flagged_reply_count=0)
+
+        call_command('rebuild_comment_counts', stdout=StringIO())
+
+        self.assertEqual(CommentCounter.objects.get(object_id=self.post_1.id).flagged_count, 1)
+        self.parent_comment_2.refresh_from_db()
+        self.assertEqual(self.parent_comment_2.flagged_reply_count, 1)
+
+    def test_rebuild_command_output(self):
+        out = StringIO()
+        call_command('rebuild_comment_counts', stdout=out)
+        self.assertIn('Comment counts rebuilt for 2 objects.', out.getvalue())
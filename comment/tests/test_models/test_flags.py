@@ -1,9 +1,11 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 
 from comment.conf import settings
-from comment.models import FlagInstance, Flag
+from comment.models import Comment, CommentCounter, FlagInstance, Flag
 from comment.tests.base import BaseCommentFlagTest
 
 
@@ -218,3 +220,101 @@ class IsFlagEnabledTest(BaseCommentFlagTest):
     @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 0)
     def test_when_disabled(self):
         self.assertIs(False, self.flag.is_flag_enabled)
+
+
+class RefreshStatesTest(BaseCommentFlagTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.parent = cls.create_comment(cls.content_object_1)
+        cls.reply = cls.create_comment(cls.content_object_1, parent=cls.parent)
+        cls.create_flag_instance(cls.user_1, cls.reply)
+        cls.create_flag_instance(cls.user_2, cls.reply)
+        cls.flag = cls.reply.flag
+
+    def set_state(self, state):
+        Flag.objects.filter(id=self.flag.id).update(state=state)
+
+    def assertState(self, state):
+        self.flag.refresh_from_db()
+        self.assertEqual(self.flag.state, state)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_flags_comments_over_allowed_count(self):
+        self.set_state(Flag.UNFLAGGED)
+
+        self.assertEqual(Flag.objects.refresh_states(), (1, 0))
+        self.assertState(Flag.FLAGGED)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 10)
+    def test_unflags_comments_under_allowed_count(self):
+        self.set_state(Flag.FLAGGED)
+
+        self.assertEqual(Flag.objects.refresh_states(), (0, 1))
+        self.assertState(Flag.UNFLAGGED)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_same_result_as_toggle_flagged_state(self):
+        for state in [Flag.UNFLAGGED, Flag.FLAGGED, Flag.REJECTED, Flag.RESOLVED]:
+            self.set_state(state)
+            self.flag.refresh_from_db()
+            self.flag.toggle_flagged_state()
+            expected_state = self.flag.state
+            self.set_state(state)
+
+            Flag.objects.refresh_states()
+
+            self.assertState(expected_state)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 0)
+    def test_flagging_disabled(self):
+        self.set_state(Flag.FLAGGED)
+
+        self.assertEqual(Flag.objects.refresh_states(), (0, 0))
+        self.assertState(Flag.FLAGGED)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_rebuilds_flagged_counts(self):
+        self.set_state(Flag.UNFLAGGED)
+        Comment.objects.update(flagged_reply_count=0)
+
+        Flag.objects.refresh_states()
+
+        self.parent.refresh_from_db()
+        self.assertEqual(self.parent.flagged_reply_count, 1)
+        self.assertEqual(CommentCounter.objects.get(object_id=self.content_object_1.id).flagged_count, 1)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_nothing_to_refresh(self):
+        self.set_state(Flag.FLAGGED)
+
+        # two updates within a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(Flag.objects.refresh_states(), (0, 0))
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_dry_run(self):
+        self.set_state(Flag.UNFLAGGED)
+
+        self.assertEqual(Flag.objects.refresh_states(dry_run=True), (1, 0))
+        self.assertState(Flag.UNFLAGGED)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_command(self):
+        self.set_state(Flag.UNFLAGGED)
+        out = StringIO()
+
+        call_command('refresh_flag_states', stdout=out)
+
+        self.assertIn('1 flags flagged, 0 unflagged.', out.getvalue())
+        self.assertState(Flag.FLAGGED)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_command_dry_run(self):
+        self.set_state(Flag.UNFLAGGED)
+        out = StringIO()
+
+        call_command('refresh_flag_states', '--dry-run', stdout=out)
+
+        self.assertIn('1 flags would be flagged, 0 would be unflagged.', out.getvalue())
+        self.assertState(Flag.UNFLAGGED)
@@ -46,6 +46,24 @@ class FollowerManagerTest(BaseCommentTest):
         self.assertTrue(self.manager.is_following(self.follower_email, self.comment_test_follow))
         self.assertFalse(self.manager.is_following(self.unfollower_email, self.comment_test_follow))
 
+    def test_get_followed_objects(self):
+        comment_ct = ContentType.objects.get_for_model(self.comment_test_follow)
+        self.manager.create(email=self.follower_email, username='test', content_object=self.content_object_1)
+        objects = [self.content_object_1, self.comment_test_follow, self.comment_without_email]
+
+        with self.assertNumQueries(1):
+            followed = self.manager.get_followed_objects(self.follower_email, objects)
+
+        self.assertEqual(followed, {
+            (ContentType.objects.get_for_model(self.content_object_1).id, self.content_object_1.id),
+            (comment_ct.id, self.comment_test_follow.id),
+        })
+        self.assertEqual(self.manager.get_followed_objects(self.unfollower_email, objects), set())
+
+    def test_get_followed_objects_without_email(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.manager.get_followed_objects(None, [self.comment_test_follow]), set())
+
     def test_follow_return_none_on_missing_email(self):
         self.assertIsNone(self.manager.follow('', 'username', self.comment_test_follow))
 
@@ -138,6 +156,31 @@ class FollowerManagerTest(BaseCommentTest):
         # parent comment is now followed
         self.assertTrue(self.manager.is_following(parent_comment.email, parent_comment))
 
+    @patch.object(settings, 'COMMENT_ALLOW_SUBSCRIPTION', False)
+    def test_follow_parent_thread_for_comment_in_one_query(self):
+        parent_comment = self.create_comment(self.content_object_1, user=self.user_2)
+        ContentType.objects.get_for_model(parent_comment.content_object)
+        ContentType.objects.get_for_model(parent_comment)
+
+        with self.assertNumQueries(1):
+            self.manager.follow_parent_thread_for_comment(parent_comment)
+
+        # following again is ignored
+        with self.assertNumQueries(1):
+            self.manager.follow_parent_thread_for_comment(parent_comment)
+        self.assertEqual(self.manager.filter(email=parent_comment.email).count(), 2)
+
+    @patch.object(settings, 'COMMENT_ALLOW_SUBSCRIPTION', False)
+    def test_follow_parent_thread_for_comment_without_ignoring_conflicts(self):
+        parent_comment = self.create_comment(self.content_object_1, user=self.user_2)
+        self.manager.follow(parent_comment.email, 'test', parent_comment)
+
+        with patch('django.db.backends.sqlite3.features.DatabaseFeatures.supports_ignore_conflicts', False):
+            self.manager.follow_parent_thread_for_comment(parent_comment)
+
+        self.assertTrue(self.manager.is_following(parent_comment.email, parent_comment.content_object))
+        self.assertEqual(self.manager.filter(email=parent_comment.email).count(), 2)
+
     def test_get_all_followers_for_model_object(self):
         followers = self.manager.filter_for_model_object(self.comment_test_follow)
         self.assertNotEqual(followers.count(), 0)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.utils import timezone
+
+from comment.conf import settings
+from comment.models import Comment, OutboxEmail
+from comment.tests.test_utils import BaseAnonymousCommentTest
+
+
+class OutboxEmailModelTest(BaseAnonymousCommentTest):
+    def setUp(self):
+        super().setUp()
+        self.comment = Comment.objects.create(content_object=self.post_1, content='outbox', user=self.user_1)
+
+    def test_add_notification(self):
+        email = OutboxEmail.objects.add_notification(self.comment, self.request)
+
+        self.assertEqual(email.kind, OutboxEmail.NOTIFICATION)
+        self.assertEqual(email.comment, self.comment)
+        self.assertEqual(email.host, self.request.get_host())
+        self.assertEqual(email.attempts, 0)
+        self.assertEqual(str(email), f'notification email {email.id}')
+
+    def test_add_confirmation(self):
+        email = OutboxEmail.objects.add_confirmation(self.key, self.request, api=True)
+
+        self.assertEqual(email.kind, OutboxEmail.CONFIRMATION)
+        self.assertIsNone(email.comment)
+        self.assertEqual(email.confirmation_key, self.key)
+        self.assertTrue(email.api)
+
+    def test_get_request(self):
+        email = OutboxEmail.objects.add_notification(self.comment, self.request)
+
+        self.assertEqual(email.get_request().get_host(), self.request.get_host())
+
+    @patch.object(settings, 'COMMENT_OUTBOX_RETRY_DELAY', 10)
+    def test_retry_later(self):
+        email = OutboxEmail.objects.add_notification(self.comment, self.request)
+        now = timezone.now()
+
+        email.retry_later(ConnectionError('connection refused'))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'connection refused')
+        self.assertAlmostEqual(email.next_attempt, now + timedelta(seconds=10), delta=timedelta(seconds=1))
+
+        email.retry_later(ConnectionError('connection refused'))
+        self.assertAlmostEqual(email.next_attempt, now + timedelta(seconds=20), delta=timedelta(seconds=1))
+
+    @patch.object(settings, 'COMMENT_OUTBOX_MAX_ATTEMPTS', 2)
+    def test_filter_pending(self):
+        pending = OutboxEmail.objects.add_notification(self.comment, self.request)
+        OutboxEmail.objects.add_notification(self.comment, self.request).retry_later('error')
+        OutboxEmail.objects.create(
+            kind=OutboxEmail.NOTIFICATION, comment=self.comment, attempts=2, next_attempt=timezone.now()
+        )
+
+        self.assertEqual(list(OutboxEmail.objects.filter_pending()), [pending])
+        self.assertEqual(list(OutboxEmail.objects.lock_pending(10)), [pending])
+
+    @patch.object(connection.features, 'has_select_for_update_of', True)
+    def test_lock_outbox_rows_only(self):
+        for qs in [OutboxEmail.objects.lock_pending(10), OutboxEmail.objects.lock_digests()]:
+            self.assertTrue(qs.query.select_for_update)
+            self.assertEqual(qs.query.select_for_update_of, ('self',))
+
+    @patch.object(connection.features, 'has_select_for_update_of', False)
+    def test_lock_without_of_support(self):
+        self.assertEqual(OutboxEmail.objects.lock_pending(10).query.select_for_update_of, ())
+
+    def test_deleted_with_comment(self):
+        OutboxEmail.objects.add_notification(self.comment, self.request)
+        self.comment.delete()
+
+        self.assertFalse(OutboxEmail.objects.exists())
@@ -1,5 +1,8 @@
+from unittest.mock import MagicMock
+
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.db.models import signals
 
 from comment.models import ReactionInstance
 from comment.tests.base import BaseCommentManagerTest, BaseCommentTest
@@ -85,6 +88,26 @@ class ReactionInstanceModelTest(BaseCommentManagerTest):
         self.assertEqual(comment.dislikes, 1)
         self.assertEqual(comment.likes, 0)
 
+    def test_switching_reaction_updates_instance_in_place(self):
+        comment = self.child_comment_3
+        user = self.user_2
+        self.set_reaction(user, comment, self.LIKE)
+        instance = ReactionInstance.objects.get(user=user, reaction=comment.reaction)
+        receiver = MagicMock()
+        signals.post_save.connect(receiver, sender=ReactionInstance)
+        self.addCleanup(signals.post_save.disconnect, receiver, sender=ReactionInstance)
+
+        self.set_reaction(user, comment, self.DISLIKE)
+
+        switched = ReactionInstance.objects.get(user=user, reaction=comment.reaction)
+        self.assertEqual(switched.pk, instance.pk)
+        self.assertEqual(switched.reaction_type, ReactionInstance.ReactionType.DISLIKE.value)
+        self.assertEqual(comment.reaction.likes, 0)
+        self.assertEqual(comment.reaction.dislikes, 1)
+        receiver.assert_called_once()
+        self.assertIs(receiver.call_args[1]['created'], False)
+        self.assertIn('reaction_type', receiver.call_args[1]['update_fields'])
+
     def test_set_reaction_on_incorrect_reaction(self):
         """Test ValidationError is raised when incorrect reaction type is passed"""
         self.assertRaises(ValidationError, self.set_reaction, self.user_1, self.child_comment_5, 'likes')
@@ -100,6 +123,28 @@ class ReactionModelTest(BaseCommentTest):
         self.assertEqual(self.comment_1.reaction.likes, 0)
         self.assertEqual(self.comment_1.reaction.dislikes, 0)
 
+    def test_switch_reaction_count(self):
+        like = ReactionInstance.ReactionType.LIKE.value
+        dislike = ReactionInstance.ReactionType.DISLIKE.value
+        reaction = self.comment_2.reaction
+        reaction.increase_reaction_count(like)
+
+        reaction.switch_reaction_count(like, dislike)
+
+        self.assertEqual(reaction.likes, 0)
+        self.assertEqual(reaction.dislikes, 1)
+
+        reaction.switch_reaction_count(dislike, dislike)
+        reaction.refresh_from_db()
+
+        self.assertEqual(reaction.likes, 0)
+        self.assertEqual(reaction.dislikes, 1)
+
+        reaction.switch_reaction_count(dislike, like)
+
+        self.assertEqual(reaction.likes, 1)
+        self.assertEqual(reaction.dislikes, 0)
+
         self.comment_1.reaction.increase_reaction_count(ReactionInstance.ReactionType.LIKE.value)
         self.comment_1.reaction.refresh_from_db()
 
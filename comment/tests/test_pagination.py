@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+from comment.conf import settings
+from comment.models import Comment
+from comment.pagination import encode_cursor, decode_cursor, paginate_comments_by_cursor
+from comment.tests.base import BaseCommentTest
+
+
+class CursorTest(BaseCommentTest):
+    def test_encode_and_decode(self):
+        comment = Comment.objects.create(content_object=self.post_1, content='cursor', user=self.user_1)
+
+        self.assertEqual(decode_cursor(encode_cursor(comment.posted, comment.id)), (comment.posted, comment.id))
+
+    def test_decode_invalid_cursor(self):
+        for cursor in ['invalid', 'bnVsbA==', '']:
+            self.assertIsNone(decode_cursor(cursor))
+
+
+class PaginateCommentsByCursorTest(BaseCommentTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for index in range(7):
+            Comment.objects.create(content_object=cls.post_1, content='comment {}'.format(index), user=cls.user_1)
+
+    def setUp(self):
+        super().setUp()
+        self.comments = Comment.objects.filter_parents_with_replies(self.post_1)
+        self.ordered_ids = list(self.comments.order_by('-posted', '-id').values_list('id', flat=True))
+
+    def get_all_pages(self):
+        pages = []
+        cursor = None
+        while True:
+            page = paginate_comments_by_cursor(self.comments, 3, cursor)
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_first_page(self):
+        page = paginate_comments_by_cursor(self.comments, 3)
+
+        self.assertEqual([comment.id for comment in page], self.ordered_ids[:3])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_other_pages())
+
+    def test_walking_through_pages(self):
+        pages = self.get_all_pages()
+
+        self.assertEqual([comment.id for page in pages for comment in page], self.ordered_ids)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertTrue(pages[-1].has_previous())
+        # the second page links back to the first page without a cursor
+        self.assertTrue(pages[1].has_previous())
+        self.assertIsNone(pages[1].previous_cursor)
+        previous_page = paginate_comments_by_cursor(self.comments, 3, pages[2].previous_cursor)
+        self.assertEqual([comment.id for comment in previous_page], self.ordered_ids[3:6])
+
+    def test_page_query_count(self):
+        cursor = self.get_all_pages()[1].next_cursor
+        # previous markers, the page itself and the replies of its parents
+        with self.assertNumQueries(3):
+            paginate_comments_by_cursor(self.comments, 3, cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = paginate_comments_by_cursor(self.comments, 3, 'invalid')
+
+        self.assertEqual([comment.id for comment in page], self.ordered_ids[:3])
+
+    @patch.object(settings, 'COMMENT_ORDER_BY', ['posted'])
+    def test_ascending_order(self):
+        pages = self.get_all_pages()
+        ordered_ids = list(self.comments.order_by('posted', 'id').values_list('id', flat=True))
+
+        self.assertEqual([comment.id for page in pages for comment in page], ordered_ids)
@@ -0,0 +1,48 @@
+from unittest import skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+
+from comment.models import Comment, Follower, BlockedUser
+from comment.tests.base import BaseCommentTest
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against the SQLite planner only')
+class QueryPlanTest(BaseCommentTest):
+    """
+    Make sure the hot lookups are served by the indexes added in `0014_lookup_indexes`.
+    SQLite picks an index deterministically on small tables, other backends may prefer a sequential scan here.
+    When a lookup below changes, add or adjust the matching index in the model's `Meta.indexes`.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.comment = cls.create_comment(cls.content_object_1)
+        cls.content_type = ContentType.objects.get_for_model(cls.post_1)
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = qs.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan, msg=f'Unexpected query plan: {plan}')
+
+    def test_parent_comments_by_object(self):
+        self.assertUsesIndex(Comment.objects.filter_parents_by_object(self.post_1), 'comment_object_parents_idx')
+
+    def test_all_comments_by_object(self):
+        self.assertUsesIndex(Comment.objects.all_comments_by_object(self.post_1), 'comment_object_posted_idx')
+
+    def test_comment_exists(self):
+        qs = Comment.objects.filter(email=self.comment.email, posted=self.comment.posted)
+        self.assertUsesIndex(qs, 'comment_email_posted_idx')
+
+    def test_followers_of_object(self):
+        self.assertUsesIndex(Follower.objects.filter_for_model_object(self.post_1), 'follower_object_idx')
+
+    def test_is_following(self):
+        qs = Follower.objects.filter(email=self.user_1.email, content_type=self.content_type, object_id=self.post_1.id)
+        # the index of the unique constraint is named by the database
+        plan = qs.explain()
+        self.assertIn('USING INDEX', plan)
+        self.assertIn('(email=? AND content_type_id=? AND object_id=?)', plan, msg=f'Unexpected query plan: {plan}')
+
+    def test_is_user_blocked_by_email(self):
+        self.assertUsesIndex(BlockedUser.objects.filter(email='a@a.com', blocked=True), 'blockeduser_email_blocked_idx')
@@ -1,14 +1,26 @@
+import os
+from io import StringIO
+from threading import Event
 from unittest.mock import patch
 
 from django.core import mail
-from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends import locmem
 from django.shortcuts import reverse
+from django.template import engines
+from django.test import SimpleTestCase
+from django.utils import timezone
 
 from comment.conf import settings
 from comment.tests.test_utils import BaseAnonymousCommentTest
 from comment.service.email import DABEmailService
 from comment.messages import EmailInfo
-from comment.models import Follower
+from comment.models import Comment, Follower, OutboxEmail
+from comment.service.delivery import EmailDeliveryWorker, email_delivery
+from comment.service.digest import send_comment_digests
+from comment.service.outbox import send_outbox_emails
+from comment.utils import get_comment_from_key
 
 
 @patch.object(settings, 'COMMENT_ALLOW_ANONYMOUS', True)
@@ -108,15 +120,14 @@ class TestDABEmailService(BaseAnonymousCommentTest):
 
         self.email_service.send_messages(messages)
 
-        self.assertNotEqual(len(mail.outbox), 100)
-        self.assertTrue(self.email_service._email_thread.is_alive())
-        self.email_service._email_thread.join()
+        self.assertTrue(email_delivery.is_running)
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 100)
 
     def test_send_confirmation_request_django(self):
         self.email_service.send_confirmation_request()
-        self.email_service._email_thread.join()
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 1)
         sent_email = mail.outbox[0]
@@ -131,7 +142,7 @@ class TestDABEmailService(BaseAnonymousCommentTest):
 
     def test_send_confirmation_request_api(self):
         self.email_service.send_confirmation_request(api=True)
-        self.email_service._email_thread.join()
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 1)
         sent_email = mail.outbox[0]
@@ -175,6 +186,67 @@ class TestDABEmailService(BaseAnonymousCommentTest):
 
         self.assertEqual(thread_name, str(email_service.comment.parent).split(':')[0])
 
+    def test_get_messages_for_notification_renders_templates_once(self):
+        for index, username in enumerate(['test_user', 'test_user', '<b>user</b>', 'other & user']):
+            Follower.objects.follow('follower-{}@test.com'.format(index), username, self.comment_obj.content_object)
+        followers = Follower.objects.filter_for_model_object(self.comment_obj.content_object)
+        thread_name = self.email_service.get_thread_name()
+
+        with patch.object(
+            self.email_service, 'get_message_templates', wraps=self.email_service.get_message_templates
+        ) as mocked_get_message_templates:
+            messages = list(self.email_service.get_messages_for_notification(thread_name, followers))
+        # the templates and a control placeholder
+        self.assertEqual(mocked_get_message_templates.call_count, 2)
+
+        text_template = 'comment/notifications/notification.txt'
+        html_template = 'comment/notifications/notification.html'
+        for follower, message in zip(followers, messages):
+            context = self.email_service.get_msg_context(thread_name=thread_name, receiver=follower.username)
+            text_msg, html_msg = self.email_service.get_message_templates(text_template, html_template, context)
+            self.assertEqual(message.to, [follower.email])
+            self.assertEqual(message.body, text_msg)
+            self.assertEqual(message.alternatives[0][0], html_msg)
+
+    def test_get_receiver_message_templates_with_altered_receiver(self):
+        template = engines['django'].from_string(
+            'Hey {{ receiver|upper }}, {% autoescape off %}{{ receiver }}{% endautoescape %}'
+        )
+        with patch('comment.service.email.loader.get_template', return_value=template) as mocked_get_template:
+            render = self.email_service.get_receiver_message_templates('text', 'html', {})
+            self.assertEqual(render('user'), ('Hey USER, user',) * 2)
+            self.assertEqual(render('<b>other</b>'), ('Hey &lt;B&gt;OTHER&lt;/B&gt;, <b>other</b>',) * 2)
+
+        # the placeholders and each username, for both templates
+        self.assertEqual(mocked_get_template.call_count, 8)
+
+    def test_get_receiver_message_templates_unescaped_receiver(self):
+        template = engines['django'].from_string('{{ receiver }} {% autoescape off %}{{ receiver }}{% endautoescape %}')
+        with patch('comment.service.email.loader.get_template', return_value=template) as mocked_get_template:
+            render = self.email_service.get_receiver_message_templates('text', 'html', {})
+            self.assertEqual(render('a&b'), ('a&amp;b a&b', 'a&amp;b a&b'))
+            self.assertEqual(render('c'), ('c c', 'c c'))
+
+        self.assertEqual(mocked_get_template.call_count, 4)
+
+    @patch.object(settings, 'COMMENT_FOLLOWERS_CHUNK_SIZE', 2)
+    def test_send_notification_to_followers_in_chunks(self):
+        for index in range(5):
+            Follower.objects.follow('follower-{}@test.com'.format(index), 'test_user', self.comment_obj.content_object)
+
+        with patch.object(self.email_service, 'send_messages') as mocked_send_messages:
+            self.email_service.send_notification_to_followers()
+
+        self.assertEqual([len(call.args[0]) for call in mocked_send_messages.call_args_list], [2, 2, 1])
+        receivers = [message.to[0] for call in mocked_send_messages.call_args_list for message in call.args[0]]
+        self.assertCountEqual(receivers, ['follower-{}@test.com'.format(index) for index in range(5)])
+
+    def test_send_notification_to_followers_without_followers_renders_nothing(self):
+        with patch.object(self.email_service, 'get_message_templates') as mocked_get_message_templates:
+            self.email_service.send_notification_to_followers()
+
+        mocked_get_message_templates.assert_not_called()
+
     def test_send_notification_to_followers_return_none(self):
         """return None if the thread has no followers"""
         followers = Follower.objects.filter_for_model_object(
@@ -192,7 +264,7 @@ class TestDABEmailService(BaseAnonymousCommentTest):
         self.assertEqual(followers.count(), 1)
 
         self.email_service.send_notification_to_followers()
-        self.email_service._email_thread.join()
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 1)
         sent_email = mail.outbox[0]
@@ -208,3 +280,322 @@ class TestDABEmailService(BaseAnonymousCommentTest):
         self.receivers = [followers.first().email]
 
         self.email_metadata_test(sent_email)
+
+
+@patch.object(settings, 'COMMENT_EMAIL_WORKERS', 1)
+class EmailDeliveryWorkerTest(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = EmailDeliveryWorker()
+        self.addCleanup(self.worker.shutdown)
+
+    @staticmethod
+    def get_messages(count):
+        return [EmailMultiAlternatives('subject', 'body', 'no-reply@domain', ['test@test']) for _ in range(count)]
+
+    @patch.object(settings, 'COMMENT_EMAIL_SYNC_DELIVERY', True)
+    def test_sync_delivery(self):
+        self.worker.send(self.get_messages(2))
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(self.worker.is_running)
+
+    @patch.object(settings, 'COMMENT_EMAIL_BATCH_SIZE', 5)
+    def test_messages_are_sent_in_batches_over_one_connection(self):
+        connection = get_connection()
+        with patch('comment.service.delivery.get_connection', return_value=connection) as mocked_get_connection:
+            with patch.object(connection, 'send_messages', wraps=connection.send_messages) as mocked_send:
+                self.worker.send(self.get_messages(12))
+                self.worker.join()
+                self.worker.send(self.get_messages(1))
+                self.worker.join()
+
+        self.assertEqual(len(mail.outbox), 13)
+        self.assertEqual(mocked_get_connection.call_count, 1)
+        self.assertTrue(all(len(call.args[0]) <= 5 for call in mocked_send.call_args_list))
+        self.assertLess(mocked_send.call_count, 13)
+
+    def test_failed_delivery_does_not_stop_worker(self):
+        connection = get_connection()
+        with patch('comment.service.delivery.get_connection', return_value=connection):
+            with patch.object(connection, 'send_messages', side_effect=[ConnectionError, 1]):
+                with self.assertLogs('comment.service.delivery', 'ERROR'):
+                    self.worker.send(self.get_messages(1))
+                    self.worker.join()
+                self.worker.send(self.get_messages(1))
+                self.worker.join()
+
+        self.assertTrue(self.worker.is_running)
+
+    def test_threads_are_started_again_after_fork(self):
+        self.worker.start()
+        parent_threads, parent_queue = list(self.worker._threads), self.worker._queue
+        # the threads of the parent process are still running within the test, stop them once the test is done
+        self.addCleanup(lambda: [thread.join() for thread in parent_threads])
+        self.addCleanup(lambda: [parent_queue.put(EmailDeliveryWorker._STOP) for _ in parent_threads])
+
+        with patch('comment.service.delivery.os.getpid', return_value=os.getpid() + 1), \
+                patch('threading.excepthook', create=True) as mocked_excepthook:
+            self.assertFalse(self.worker.is_running)
+            self.worker.send(self.get_messages(2))
+            self.worker.join()
+
+            self.assertTrue(self.worker.is_running)
+            self.assertFalse(set(parent_threads) & set(self.worker._threads))
+            self.worker.shutdown()
+
+        self.assertEqual(len(mail.outbox), 2)
+        mocked_excepthook.assert_not_called()
+
+    def test_start_after_shutdown_without_waiting(self):
+        self.worker.start()
+        old_threads = list(self.worker._threads)
+        self.worker.shutdown(wait=False)
+
+        with patch('threading.excepthook', create=True) as mocked_excepthook:
+            self.worker.send(self.get_messages(3))
+            self.worker.join()
+            for thread in old_threads:
+                thread.join()
+
+        self.assertEqual(len(mail.outbox), 3)
+        mocked_excepthook.assert_not_called()
+        self.assertEqual(self.worker._queue.unfinished_tasks, 0)
+
+    @patch.object(settings, 'COMMENT_EMAIL_QUEUE_SIZE', 1)
+    @patch.object(settings, 'COMMENT_EMAIL_BATCH_SIZE', 1)
+    @patch.object(settings, 'COMMENT_EMAIL_QUEUE_FULL_POLICY', 'drop')
+    def test_messages_are_dropped_when_queue_is_full(self):
+        sending, release = Event(), Event()
+        connection = get_connection()
+        send_messages = connection.send_messages
+
+        def blocking_send(messages):
+            sending.set()
+            release.wait()
+            return send_messages(messages)
+
+        with patch('comment.service.delivery.get_connection', return_value=connection):
+            with patch.object(connection, 'send_messages', side_effect=blocking_send):
+                self.worker.send(self.get_messages(1))
+                sending.wait()
+                # one message fills the queue while the worker is busy, the others are dropped
+                with self.assertLogs('comment.service.delivery', 'WARNING'):
+                    self.worker.send(self.get_messages(3))
+                release.set()
+                self.worker.join()
+
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_shutdown_sends_queued_messages(self):
+        self.worker.send(self.get_messages(3))
+        self.worker.shutdown()
+
+        self.assertFalse(self.worker.is_running)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+@patch.object(settings, 'COMMENT_ALLOW_ANONYMOUS', True)
+class OutboxServiceTest(BaseAnonymousCommentTest):
+    def setUp(self):
+        super().setUp()
+        self.comment = Comment.objects.create(content_object=self.post_1, content='outbox', user=self.user_1)
+        Follower.objects.follow('follower@test.com', 'follower', self.post_1)
+
+    @patch.object(settings, 'COMMENT_EMAIL_USE_OUTBOX', True)
+    def test_emails_are_stored_in_outbox(self):
+        DABEmailService(self.comment, self.request).send_notification_to_followers()
+        DABEmailService(self.comment_obj, self.request).send_confirmation_request(api=True)
+        email_delivery.join()
+
+        self.assertEqual(len(mail.outbox), 0)
+        notification, confirmation = OutboxEmail.objects.order_by('id')
+        self.assertEqual(notification.comment, self.comment)
+        self.assertEqual(confirmation.kind, OutboxEmail.CONFIRMATION)
+        self.assertTrue(confirmation.api)
+
+    def test_send_outbox_emails(self):
+        OutboxEmail.objects.add_notification(self.comment, self.request)
+        OutboxEmail.objects.add_confirmation(self.key, self.request)
+
+        self.assertEqual(send_outbox_emails(), (2, 0))
+
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertCountEqual(
+            [message.to for message in mail.outbox], [['follower@test.com'], [self.comment_obj.email]]
+        )
+        confirmation = [message for message in mail.outbox if message.subject == EmailInfo.CONFIRMATION_SUBJECT][0]
+        self.assertIn(reverse('comment:confirm-comment', args=[self.key]), confirmation.body)
+        self.assertIn(self.request.get_host(), confirmation.body)
+
+    def test_send_outbox_emails_skips_confirmed_comments(self):
+        OutboxEmail.objects.add_confirmation(self.key, self.request)
+        get_comment_from_key(self.key).obj.save()
+
+        self.assertEqual(send_outbox_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @patch.object(settings, 'COMMENT_OUTBOX_BATCH_SIZE', 2)
+    def test_send_outbox_emails_in_batches(self):
+        for _ in range(3):
+            OutboxEmail.objects.add_notification(self.comment, self.request)
+
+        self.assertEqual(send_outbox_emails(), (2, 0))
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_failed_emails_are_retried(self):
+        email = OutboxEmail.objects.add_notification(self.comment, self.request)
+
+        with patch('comment.service.outbox.deliver_outbox_email', side_effect=ConnectionError('refused')):
+            self.assertEqual(send_outbox_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'refused')
+        # not due yet
+        self.assertEqual(send_outbox_emails(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(send_outbox_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_comment_emails_command(self):
+        for _ in range(3):
+            OutboxEmail.objects.add_notification(self.comment, self.request)
+        out = StringIO()
+
+        call_command('send_comment_emails', batch_size=2, stdout=out)
+
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('3 emails sent, 0 failed.', out.getvalue())
+
+
+class DigestServiceTest(BaseAnonymousCommentTest):
+    def setUp(self):
+        super().setUp()
+        self.parent = Comment.objects.create(content_object=self.post_1, content='parent comment', user=self.user_1)
+        self.reply = Comment.objects.create(
+            content_object=self.post_1, content='reply comment', user=self.user_2, parent=self.parent
+        )
+        self.other = Comment.objects.create(content_object=self.post_2, content='other comment', user=self.user_2)
+        for comment in [self.parent, self.reply, self.other]:
+            OutboxEmail.objects.add_digest(comment, self.request)
+        # authors follow their comments
+        Follower.objects.all().delete()
+
+    def get_email(self, receiver):
+        return [message for message in mail.outbox if message.to == [receiver]][0]
+
+    @patch.object(settings, 'COMMENT_NOTIFICATION_DIGEST', True)
+    @patch.object(settings, 'COMMENT_EMAIL_USE_OUTBOX', True)
+    def test_comments_are_stored_for_digest(self):
+        DABEmailService(self.parent, self.request).send_notification_to_followers()
+        email_delivery.join()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.filter(kind=OutboxEmail.DIGEST, comment=self.parent).count(), 2)
+        # digests are not sent as outbox emails
+        self.assertEqual(send_outbox_emails(), (0, 0))
+
+    def test_one_email_per_follower(self):
+        Follower.objects.follow('all@test.com', 'all_threads', self.post_1)
+        Follower.objects.follow('all@test.com', 'all_threads', self.parent)
+        Follower.objects.follow('all@test.com', 'all_threads', self.post_2)
+        Follower.objects.follow('post@test.com', 'post_only', self.post_1)
+
+        self.assertEqual(send_comment_digests(), 3)
+
+        self.assertEqual(len(mail.outbox), 2)
+        email = self.get_email('all@test.com')
+        self.assertEqual(email.subject, EmailInfo.DIGEST_SUBJECT)
+        for content in ['all_threads', 'parent comment', 'reply comment', 'other comment', str(self.post_2)]:
+            self.assertIn(content, email.body)
+        self.assertEqual(email.alternatives[0][1], 'text/html')
+
+        email = self.get_email('post@test.com')
+        self.assertIn('parent comment', email.body)
+        self.assertNotIn('reply comment', email.body)
+        self.assertNotIn('other comment', email.body)
+
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(send_comment_digests(), 0)
+
+    def test_own_comments_are_not_notified(self):
+        Follower.objects.follow(self.user_1.email, self.user_1.username, self.post_1)
+        Follower.objects.follow(self.user_1.email, self.user_1.username, self.parent)
+        Follower.objects.follow(self.user_2.email, self.user_2.username, self.post_2)
+
+        send_comment_digests()
+
+        self.assertEqual(len(mail.outbox), 1)
+        email = self.get_email(self.user_1.email)
+        self.assertIn('reply comment', email.body)
+        self.assertNotIn('parent comment', email.body)
+
+    def test_digest_kept_when_connection_fails(self):
+        Follower.objects.follow('post@test.com', 'post_only', self.post_1)
+
+        with patch('comment.service.digest.get_connection') as mocked_get_connection:
+            mocked_get_connection.return_value.__enter__.side_effect = ConnectionError
+            self.assertRaises(ConnectionError, send_comment_digests)
+
+        self.assertEqual(OutboxEmail.objects.count(), 3)
+
+    @patch.object(settings, 'COMMENT_FOLLOWERS_CHUNK_SIZE', 1)
+    def test_failed_digest_is_sent_later_to_followers_not_reached(self):
+        for email in ['a@test.com', 'b@test.com', 'c@test.com']:
+            Follower.objects.follow(email, email.split('@')[0], self.post_1)
+        Follower.objects.follow('d@test.com', 'd', self.post_2)
+        send_messages = locmem.EmailBackend.send_messages
+
+        def fail_after_first_chunk(backend, messages):
+            if mail.outbox:
+                raise ConnectionError('mail server down')
+            return send_messages(backend, messages)
+
+        with patch.object(locmem.EmailBackend, 'send_messages', autospec=True, side_effect=fail_after_first_chunk):
+            self.assertRaises(ConnectionError, send_comment_digests)
+
+        self.assertEqual([message.to for message in mail.outbox], [['a@test.com']])
+        self.assertEqual(
+            list(OutboxEmail.objects.order_by('receiver').values_list('receiver', 'comment', 'attempts', 'last_error')),
+            [
+                ('b@test.com', self.parent.id, 1, 'mail server down'),
+                ('c@test.com', self.parent.id, 1, 'mail server down'),
+                ('d@test.com', self.other.id, 1, 'mail server down'),
+            ]
+        )
+
+        new_comment = Comment.objects.create(content_object=self.post_1, content='new comment', user=self.user_2)
+        OutboxEmail.objects.add_digest(new_comment, self.request)
+        mail.outbox = []
+        self.assertEqual(send_comment_digests(), 3)
+
+        self.assertEqual(len(mail.outbox), 4)
+        email = self.get_email('a@test.com')
+        self.assertIn('new comment', email.body)
+        self.assertNotIn('parent comment', email.body)
+        for receiver in ['b@test.com', 'c@test.com']:
+            email = self.get_email(receiver)
+            self.assertIn('parent comment', email.body)
+            self.assertIn('new comment', email.body)
+        self.assertIn('other comment', self.get_email('d@test.com').body)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_digest_left_after_too_many_attempts(self):
+        Follower.objects.follow('post@test.com', 'post_only', self.post_1)
+        OutboxEmail.objects.update(attempts=settings.COMMENT_OUTBOX_MAX_ATTEMPTS)
+
+        self.assertEqual(send_comment_digests(), 0)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 3)
+
+    def test_send_comment_digests_command(self):
+        Follower.objects.follow('post@test.com', 'post_only', self.post_1)
+        out = StringIO()
+
+        call_command('send_comment_digests', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Digest sent for 3 comments.', out.getvalue())
@@ -2,7 +2,7 @@ from unittest.mock import patch
 
 from comment.signals import adjust_flagged_comments
 from comment.tests.base import BaseCommentSignalTest
-from comment.models import Comment, Flag, FlagInstance, Reaction, ReactionInstance
+from comment.models import Comment, CommentCounter, Flag, FlagInstance, Reaction, ReactionInstance
 from comment.conf import settings
 
 
@@ -92,6 +92,53 @@ class TestPostSave(BaseCommentSignalTest):
 
         self.assertEqual(self.comment.flag.count, 1)
 
+    def test_increase_comment_counts(self):
+        counter = CommentCounter.objects.get(object_id=self.post_1.id)
+        parent = Comment.objects.get(id=self.parent_comment_3.id)
+        self.assertEqual(parent.reply_count, 0)
+
+        reply = self.create_comment(self.content_object_1, parent=parent)
+        counter.refresh_from_db()
+        self.assertEqual(counter.comment_count, 7)
+        # the parent instance in memory is updated as well
+        self.assertEqual(parent.reply_count, 1)
+        self.assertEqual(Comment.objects.get(id=parent.id).reply_count, 1)
+
+        # editing a comment won't change the counts
+        reply.content = 'edited'
+        reply.save()
+        counter.refresh_from_db()
+        self.assertEqual(counter.comment_count, 7)
+        self.assertEqual(Comment.objects.get(id=parent.id).reply_count, 1)
+
+    def test_comment_counter_created_for_first_comment(self):
+        self.assertFalse(CommentCounter.objects.filter(object_id=self.user_1.id, content_type__model='user').exists())
+        self.create_comment(self.user_1)
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.user_1), 1)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    @patch.object(settings, 'COMMENT_SHOW_FLAGGED', False)
+    def test_update_flagged_counts(self):
+        reply = self.child_comment_2
+        self.create_flag_instance(self.user_1, reply)
+        self.create_flag_instance(self.user_2, reply)
+        parent = Comment.objects.get(id=self.parent_comment_2.id)
+        counter = CommentCounter.objects.get(object_id=self.post_1.id)
+
+        self.assertEqual(parent.flagged_reply_count, 1)
+        self.assertEqual(parent.get_replies_count(), parent.replies().count())
+        self.assertEqual(counter.flagged_count, 1)
+        self.assertEqual(counter.get_count(), Comment.objects.all_comments_by_object(self.post_1).count())
+
+        # rejecting the flag shows the comment again
+        reply.flag.refresh_from_db()
+        reply.flag.toggle_state(reply.flag.REJECTED, self.moderator)
+        parent.refresh_from_db()
+        counter.refresh_from_db()
+
+        self.assertEqual(parent.flagged_reply_count, 0)
+        self.assertEqual(counter.flagged_count, 0)
+
 
 class TestPostDelete(BaseCommentSignalTest):
     def test_reaction_decrease_count(self):
@@ -120,3 +167,30 @@ class TestPostDelete(BaseCommentSignalTest):
         comment.refresh_from_db()
 
         self.assertEqual(comment.flag.count, 0)
+
+    def test_decrease_comment_counts(self):
+        parent = Comment.objects.get(id=self.parent_comment_2.id)
+        self.assertEqual(parent.reply_count, 3)
+
+        self.child_comment_2.delete()
+        parent.refresh_from_db()
+        self.assertEqual(parent.reply_count, 2)
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.post_1), 5)
+
+        # replies of a deleted parent are removed from the count as well
+        parent.delete()
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.post_1), 3)
+        self.assertEqual(CommentCounter.objects.get_count_for_object(self.post_2), 3)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_decrease_flagged_counts(self):
+        reply = self.child_comment_2
+        self.create_flag_instance(self.user_1, reply)
+        self.create_flag_instance(self.user_2, reply)
+        counter = CommentCounter.objects.get(object_id=self.post_1.id)
+        self.assertEqual(counter.flagged_count, 1)
+
+        reply.delete()
+        counter.refresh_from_db()
+        self.assertEqual(counter.flagged_count, 0)
+        self.assertEqual(Comment.objects.get(id=self.parent_comment_2.id).flagged_reply_count, 0)
@@ -1,4 +1,5 @@
 import sys
+import threading
 from unittest.mock import patch
 
 from django.core.exceptions import ImproperlyConfigured
@@ -11,7 +12,8 @@ from comment.managers import FlagInstanceManager
 from comment.templatetags.comment_tags import (
     get_model_name, get_app_name, get_comments_count, get_img_path, get_profile_url, render_comments,
     include_bootstrap, include_static, render_field, has_reacted, has_flagged,
-    render_flag_reasons, render_content, get_username_for_comment, can_block_users_tag, is_user_blocked
+    render_flag_reasons, render_content, get_username_for_comment, can_block_users_tag, is_user_blocked, _render_text,
+    _get_markdown_renderer, _render_markdown
 )
 from comment.tests.base import BaseTemplateTagsTest
 
@@ -70,7 +72,7 @@ class GetImgPathTest(BaseTemplateTagsTest):
     @patch.object(settings, 'PROFILE_APP_NAME', 'user_profile')
     @patch.object(settings, 'COMMENT_USE_GRAVATAR', False)
     def test_profile_has_no_image_field(self):
-        with patch('comment.templatetags.comment_tags.hasattr', return_value=False):
+        with patch('comment.templatetags.comment_tags.get_profile_image_field', return_value=None):
             url = get_img_path(self.parent_comment_1)
             self.assertEqual(url, '/static/img/default.png')
 
@@ -255,6 +257,80 @@ class RenderContentTest(BaseTemplateTagsTest):
         self.assertEqual(result['urlhash'], self.comment.urlhash)
 
 
+class MarkdownRendererTest(BaseTemplateTagsTest):
+    def test_renderer_is_reused(self):
+        renderer = _get_markdown_renderer()
+
+        self.assertIs(_get_markdown_renderer(), renderer)
+
+    def test_renderer_is_rebuilt_when_settings_change(self):
+        renderer = _get_markdown_renderer()
+
+        with patch.object(settings, 'COMMENT_MARKDOWN_EXTENSIONS', ['markdown.extensions.footnotes']):
+            footnotes_renderer = _get_markdown_renderer()
+            self.assertIsNot(footnotes_renderer, renderer)
+            self.assertIs(_get_markdown_renderer(), footnotes_renderer)
+
+        self.assertIsNot(_get_markdown_renderer(), footnotes_renderer)
+
+    def test_renderer_per_thread(self):
+        renderers = []
+        thread = threading.Thread(target=lambda: renderers.append(_get_markdown_renderer()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(renderers[0], _get_markdown_renderer())
+
+    @patch.object(settings, 'COMMENT_MARKDOWN_EXTENSIONS', ['markdown.extensions.footnotes'])
+    def test_state_is_reset_between_comments(self):
+        self.assertIn('footnote', _render_markdown('text[^1]\n\n[^1]: note'))
+        self.assertEqual(_render_markdown('text'), '<p>text</p>')
+
+
+@patch.object(settings, 'COMMENT_CACHE_RENDERED_CONTENT', True)
+class RenderContentCacheTest(BaseTemplateTagsTest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.comment = cls.parent_comment_2
+        cls.comment.content = 'Cached\n\ncontent of a comment'
+        cls.comment.save()
+
+    @patch('comment.templatetags.comment_tags._render_text', wraps=_render_text)
+    def test_content_rendered_once(self, mocked_render_text):
+        result = render_content(self.comment, number=2)
+        cached_result = render_content(self.comment, number=2)
+
+        mocked_render_text.assert_called_once()
+        self.assertEqual(cached_result, result)
+        self.assertEqual(cached_result['text_1'], 'Cached<br><br>content of')
+        self.assertEqual(cached_result['text_2'], 'a comment')
+
+    @patch('comment.templatetags.comment_tags._render_text', wraps=_render_text)
+    def test_render_options_are_part_of_the_key(self, mocked_render_text):
+        render_content(self.comment, number=2)
+        render_content(self.comment, number=3)
+        render_content(self.comment, markdown=True)
+        render_content(self.comment, markdown=True)
+
+        self.assertEqual(mocked_render_text.call_count, 3)
+
+    def test_edited_content_is_rendered_again(self):
+        self.assertEqual(render_content(self.comment, number=0)['text_1'], 'Cached<br><br>content of a comment')
+        self.comment.content = 'Edited content'
+        self.comment.save()
+
+        self.assertEqual(render_content(self.comment, number=0)['text_1'], 'Edited content')
+
+    @patch('comment.templatetags.comment_tags._render_text', wraps=_render_text)
+    def test_cache_disabled(self, mocked_render_text):
+        with patch.object(settings, 'COMMENT_CACHE_RENDERED_CONTENT', False):
+            render_content(self.comment)
+            render_content(self.comment)
+
+        self.assertEqual(mocked_render_text.call_count, 2)
+
+
 class GetUsernameForCommentTest(BaseTemplateTagsTest):
     @classmethod
     def setUpTestData(cls):
@@ -350,3 +426,8 @@ class BlockingTagsTest(BaseTemplateTagsTest):
     @patch('comment.managers.BlockedUserManager.is_user_blocked', return_value=False)
     def test_unblocked_user(self, _):
         self.assertFalse(is_user_blocked(self.parent_comment_1))
+
+    @patch('comment.managers.BlockedUserManager.is_user_blocked')
+    def test_blocked_status_from_context(self, mocked_is_user_blocked):
+        self.assertTrue(is_user_blocked(self.parent_comment_1, {self.parent_comment_1.id: True}))
+        mocked_is_user_blocked.assert_not_called()
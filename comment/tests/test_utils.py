@@ -1,14 +1,20 @@
+from unittest import skipUnless
 from unittest.mock import patch
 
-from django.core.exceptions import ImproperlyConfigured
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.utils import timezone
 from django.core import signing
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import override_settings
 
 from comment.conf import settings
 from comment.utils import (
     get_model_obj, has_valid_profile, id_generator, get_comment_from_key, get_user_for_request, CommentFailReason,
-    get_gravatar_img, get_profile_instance, is_comment_moderator, is_comment_admin, get_wrapped_words_number
+    get_gravatar_img, get_profile_instance, is_comment_moderator, is_comment_admin, get_wrapped_words_number,
+    time_ordered_id_generator, update_counters, _can_update_returning, clear_profile_cache,
+    get_profile_image_field, get_user_related_lookups, ProfileInfo, get_profile_content_type
 )
 from comment.tests.base import BaseCommentUtilsTest, Comment, RequestFactory
 from comment.messages import ErrorMessage
@@ -24,6 +30,30 @@ class GetModelObjectTest(BaseCommentUtilsTest):
         model_object = get_model_obj(**data)
         self.assertIsInstance(model_object, self.post_1.__class__)
 
+    def test_resolved_in_one_query(self):
+        ContentType.objects.get_for_model(self.post_1)
+
+        with self.assertNumQueries(1):
+            model_object = get_model_obj('post', 'Post', self.post_1.id)
+
+        self.assertEqual(model_object, self.post_1)
+
+    def test_object_does_not_exist(self):
+        self.assertRaises(ObjectDoesNotExist, get_model_obj, 'post', 'Post', 100)
+
+    def test_model_does_not_exist(self):
+        self.assertRaises(ContentType.DoesNotExist, get_model_obj, 'post', 'not exists', self.post_1.id)
+
+    @patch.object(settings, 'COMMENT_CONTENT_OBJECT_CACHE_TIMEOUT', 60)
+    def test_cached_object(self):
+        ContentType.objects.get_for_model(self.post_1)
+        get_model_obj('post', 'Post', self.post_1.id)
+
+        with self.assertNumQueries(0):
+            model_object = get_model_obj('post', 'Post', self.post_1.id)
+
+        self.assertEqual(model_object, self.post_1)
+
 
 class GetGratavarImgTest(BaseCommentUtilsTest):
     @patch.object(settings, 'COMMENT_USE_GRAVATAR', True)
@@ -60,9 +90,29 @@ class HasValidProfileTest(BaseCommentUtilsTest):
         self.assertIs(has_valid_profile(), True)
 
     def test_model_provided_without_image(self):
+        clear_profile_cache()
+        self.addCleanup(clear_profile_cache)
         with patch('comment.utils.hasattr', return_value=False):
             self.assertIs(has_valid_profile(), False)
 
+    def test_profile_model_introspected_once(self):
+        clear_profile_cache()
+        with patch('comment.utils._introspect_profile', return_value=ProfileInfo(None, 'image', None)) as mocked_find:
+            self.assertIs(has_valid_profile(), True)
+            with self.assertNumQueries(0):
+                self.assertIs(has_valid_profile(), True)
+
+        mocked_find.assert_called_once_with('user_profile', 'userprofile')
+
+    def test_cache_cleared_when_setting_changes(self):
+        get_profile_image_field()
+        with patch('comment.utils._introspect_profile', return_value=ProfileInfo(None, None, None)) as mocked_find:
+            with override_settings(PROFILE_MODEL_NAME='userprofile'):
+                self.assertIs(has_valid_profile(), False)
+
+        mocked_find.assert_called()
+        self.assertEqual(get_profile_image_field(), 'image')
+
     @patch.object(settings, 'PROFILE_MODEL_NAME', '')
     def test_missing_setting_attribute(self):
         self.assertIs(has_valid_profile(), False)
@@ -76,6 +126,36 @@ class HasValidProfileTest(BaseCommentUtilsTest):
         self.assertIs(has_valid_profile(), True)
 
 
+class GetProfileContentTypeTest(BaseCommentUtilsTest):
+    def test_profile_model(self):
+        content_type = ContentType.objects.get(app_label='user_profile', model='userprofile')
+        self.assertEqual(get_profile_content_type(), content_type)
+
+    @patch.object(settings, 'PROFILE_MODEL_NAME', 'wrong')
+    def test_wrong_model(self):
+        self.assertIsNone(get_profile_content_type())
+
+    @patch.object(settings, 'PROFILE_APP_NAME', None)
+    def test_missing_setting(self):
+        self.assertIsNone(get_profile_content_type())
+
+
+class GetUserRelatedLookupsTest(BaseCommentUtilsTest):
+    def test_with_profile(self):
+        self.assertEqual(get_user_related_lookups(), ['user', 'user__userprofile'])
+
+    def test_prefix(self):
+        self.assertEqual(get_user_related_lookups('parent__user'), ['parent__user', 'parent__user__userprofile'])
+
+    @patch.object(settings, 'PROFILE_MODEL_NAME', None)
+    def test_without_profile(self):
+        self.assertEqual(get_user_related_lookups(), ['user'])
+
+    @patch.object(settings, 'PROFILE_MODEL_NAME', 'post')
+    def test_model_not_related_to_user(self):
+        self.assertEqual(get_user_related_lookups(), ['user'])
+
+
 class IsCommentModeratorTest(BaseCommentUtilsTest):
     @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', False)
     @patch.object(settings, 'COMMENT_ALLOW_BLOCKING_USERS', False)
@@ -87,6 +167,23 @@ class IsCommentModeratorTest(BaseCommentUtilsTest):
     def test_one_moderation_system_enabled(self):
         self.assertIs(is_comment_moderator(self.moderator), True)
 
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_groups_are_fetched_once_per_user_object(self):
+        moderator = type(self.moderator).objects.get(pk=self.moderator.pk)
+        with self.assertNumQueries(1):
+            self.assertIs(is_comment_moderator(moderator), True)
+            self.assertIs(is_comment_moderator(moderator), True)
+
+    @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', 1)
+    def test_role_checks_are_reused(self):
+        user = type(self.user_1).objects.get(pk=self.user_1.pk)
+        is_comment_moderator(user)
+        is_comment_admin(user)
+
+        with self.assertNumQueries(0):
+            self.assertIs(is_comment_moderator(user), False)
+            self.assertIs(is_comment_admin(user), False)
+
 
 class IsCommentAdminTest(BaseCommentUtilsTest):
     @patch.object(settings, 'COMMENT_FLAGS_ALLOWED', False)
@@ -245,3 +342,63 @@ class TestIdGenerator(BaseCommentUtilsTest):
     def test_id_generator_len(self):
         len_id = 8
         self.assertEqual(len_id, len(id_generator(len_id=len_id)))
+
+
+class TestTimeOrderedIdGenerator(BaseCommentUtilsTest):
+    def test_generates_increasing_ids(self):
+        ids = [time_ordered_id_generator() for _ in range(100)]
+
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_prefix_and_suffix(self):
+        output = time_ordered_id_generator(prefix='comment-', len_id=4, suffix='-end')
+
+        self.assertTrue(output.startswith('comment-'))
+        self.assertTrue(output.endswith('-end'))
+
+    @patch('comment.utils.time.time_ns')
+    def test_same_time(self, mocked_time_ns):
+        mocked_time_ns.return_value = 0
+
+        self.assertNotEqual(time_ordered_id_generator(len_id=0), time_ordered_id_generator(len_id=0))
+
+
+class UpdateCountersTest(BaseCommentUtilsTest):
+    def setUp(self):
+        super().setUp()
+        self.comment = Comment.objects.create(
+            content_object=self.post_1, content='counter', user=self.user_1, email=self.user_1.email
+        )
+        self.reaction = self.comment.reaction
+
+    @skipUnless(_can_update_returning(connection), 'The database does not support UPDATE ... RETURNING')
+    def test_single_statement_with_returning(self):
+        with self.assertNumQueries(1):
+            update_counters(self.reaction, returning=['likes', 'dislikes'], likes=1)
+
+        self.assertEqual(self.reaction.likes, 1)
+        self.assertEqual(self.reaction.dislikes, 0)
+        self.reaction.refresh_from_db()
+        self.assertEqual(self.reaction.likes, 1)
+
+    @patch('comment.utils._can_update_returning', return_value=False)
+    def test_fallback_without_returning(self, _):
+        with self.assertNumQueries(2):
+            update_counters(self.reaction, dislikes=1)
+
+        self.assertEqual(self.reaction.dislikes, 1)
+        update_counters(self.reaction, dislikes=-1)
+        self.assertEqual(self.reaction.dislikes, 0)
+
+    def test_stale_instance_gets_stored_value(self):
+        type(self.reaction).objects.filter(pk=self.reaction.pk).update(likes=5)
+
+        update_counters(self.reaction, likes=1)
+
+        self.assertEqual(self.reaction.likes, 6)
+
+    def test_several_counters(self):
+        update_counters(self.reaction, likes=2, dislikes=1)
+
+        self.assertEqual(self.reaction.likes, 2)
+        self.assertEqual(self.reaction.dislikes, 1)
@@ -1,3 +1,4 @@
+from django.contrib.contenttypes.models import ContentType
 from django.http import JsonResponse
 from django.test import TestCase
 from django.views import View
@@ -107,6 +108,15 @@ class ValidatorMixinTest(BaseCommentMixinTest):
             ContentTypeError.MODEL_ID_INVALID.format(model_id=model_id, model_name=url_data['model_name'])
         )
 
+    def test_target_resolved_in_one_query(self):
+        ContentType.objects.get_for_model(self.post_1)
+        request = self.factory.get(self.get_url(**self.data))
+
+        with self.assertNumQueries(1):
+            self.view.validate(request)
+
+        self.assertEqual(self.view.model_obj, self.post_1)
+
     def test_model_id_non_integral(self):
         url_data = self.data.copy()
         model_id = 'not integral'
@@ -9,11 +9,13 @@ from rest_framework import status
 from django.contrib import messages
 
 from comment.conf import settings
-from comment.models import Comment, Follower
+from comment.models import Comment, Follower, OutboxEmail
 from comment.messages import EmailInfo, EmailError
 from comment.tests.base import BaseCommentViewTest
 from comment.tests.test_utils import BaseAnonymousCommentTest
+from comment.templatetags.comment_tags import render_content
 from comment.views import ConfirmComment
+from comment.service.delivery import email_delivery
 
 
 class CommentViewTestCase(BaseCommentViewTest):
@@ -90,12 +92,32 @@ class CommentViewTestCase(BaseCommentViewTest):
         Follower.objects.follow('te@te.com', 'test_user', self.post_1)
         self.assertEqual(len(mail.outbox), 0)
         url = self.get_create_url()
-        response = self.client.post(url, data=self.data)
+        with self.run_on_commit():
+            response = self.client.post(url, data=self.data)
 
         self.assertEqual(response.status_code, 200)
-        response.context['view'].email_service._email_thread.join()
+        email_delivery.join()
         self.assertEqual(len(mail.outbox), 1)
 
+    def test_notification_is_sent_once_comment_is_committed(self):
+        Follower.objects.follow('te@te.com', 'test_user', self.post_1)
+        response = self.client.post(self.get_create_url(), data=self.data)
+
+        self.assertEqual(response.status_code, 200)
+        email_delivery.join()
+        # the transaction of the test case is never committed
+        self.assertEqual(len(mail.outbox), 0)
+
+    @patch.object(settings, 'COMMENT_EMAIL_USE_OUTBOX', True)
+    def test_notification_is_stored_in_outbox_on_create_comment(self):
+        Follower.objects.follow('te@te.com', 'test_user', self.post_1)
+        response = self.client.post(self.get_create_url(), data=self.data)
+
+        self.assertEqual(response.status_code, 200)
+        email_delivery.join()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().comment, response.context['comment'])
+
     def test_create_comment_non_ajax_request(self):
         response = self.client_non_ajax.post(self.get_create_url(), data=self.data)
 
@@ -115,7 +137,7 @@ class CommentViewTestCase(BaseCommentViewTest):
         self.assertTemplateUsed(response, 'comment/comments/base.html')
         self.assertEqual(response.json()['msg'], EmailInfo.CONFIRMATION_SENT)
         # confirmation email is sent
-        response.context['view'].email_service._email_thread.join()
+        email_delivery.join()
 
         self.assertEqual(len(mail.outbox), 1)
 
@@ -176,6 +198,27 @@ class TestEditComment(BaseCommentViewTest):
             )
         self.assertIsInstance(error.exception, ValueError)
 
+    @patch.object(settings, 'COMMENT_CACHE_RENDERED_CONTENT', True)
+    def test_edited_comment_is_not_rendered_from_cache(self):
+        comment = Comment.objects.create(
+            content_object=self.content_object_1, content='cached content', user=self.user_2
+        )
+        self.assertEqual(render_content(comment)['text_1'], 'cached content')
+        data = {
+            'content': 'edited content',
+            'app_name': 'post',
+            'model_name': 'post',
+            'model_id': self.post_1.id
+        }
+
+        response = self.client.post(
+            self.get_url('comment:edit', comment.id), data=data, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('edited content', response.json()['data'])
+        self.assertNotIn('cached content', response.json()['data'])
+
     def test_cannot_edit_comment_by_different_user(self):
         comment = self.comment
         self.client.force_login(self.user_2)
@@ -279,6 +322,42 @@ class TestDeleteComment(BaseCommentViewTest):
         self.response_fails_test(response, comment)
 
 
+class TestCommentReplies(BaseCommentViewTest):
+    def setUp(self):
+        super().setUp()
+        self.parent = Comment.objects.create(content_object=self.post_1, content='parent', user=self.user_1)
+        self.reply = Comment.objects.create(
+            content_object=self.post_1, content='lazy reply', user=self.user_1, parent=self.parent
+        )
+
+    def test_load_replies(self):
+        response = self.client.get(self.get_url('comment:replies', self.parent.id))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'comment/comments/replies.html')
+        self.assertTemplateUsed(response, 'comment/comments/child_comment.html')
+        self.assertIn('lazy reply', response.json()['data'])
+        self.assertEqual(response.json()['error'], None)
+
+    def test_load_replies_non_ajax_request(self):
+        response = self.client_non_ajax.get(self.get_url('comment:replies', self.parent.id))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_load_replies_of_child_comment(self):
+        response = self.client.get(self.get_url('comment:replies', self.reply.id))
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch.object(settings, 'COMMENT_LAZY_LOAD_REPLIES', True)
+    def test_replies_are_not_rendered_with_thread(self):
+        response = self.client.post(self.get_url('comment:create'), data={**self.data, 'content': 'new parent'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.get_url('comment:replies', self.parent.id), response.json()['data'])
+        self.assertNotIn('lazy reply', response.json()['data'])
+
+
 class ConfirmCommentViewTest(BaseAnonymousCommentTest):
     def setUp(self):
         super().setUp()
@@ -353,12 +432,13 @@ class ConfirmCommentViewTest(BaseAnonymousCommentTest):
         request = RequestFactory().get(self.get_url())
         request.user = self.user_2
         view = ConfirmComment()
-        response = view.get(request, key=self.key)
+        with self.run_on_commit():
+            response = view.get(request, key=self.key)
         comment = Comment.objects.get(email=self.comment_obj.email, posted=self.time_posted)
 
         self.assertEqual(Comment.objects.all().count(), self.init_count + 1)
         self.assertEqual(response.status_code, status.HTTP_302_FOUND)
         self.assertEqual(response.url, comment.get_url(self.request))
 
-        view.email_service._email_thread.join()
+        email_delivery.join()
         self.assertEqual(len(mail.outbox), 1)
@@ -4,7 +4,7 @@ from django.views.i18n import JavaScriptCatalog
 
 from comment import __version__
 from comment.views import (
-    CreateComment, UpdateComment, DeleteComment, SetReaction, SetFlag, ChangeFlagState,
+    CreateComment, UpdateComment, DeleteComment, CommentReplies, SetReaction, SetFlag, ChangeFlagState,
     ConfirmComment, ToggleFollowView, ToggleBlockingView
 )
 
@@ -15,6 +15,7 @@ urlpatterns = [
     path('create/', CreateComment.as_view(), name='create'),
     path('edit/<int:pk>/', UpdateComment.as_view(), name='edit'),
     path('delete/<int:pk>/', DeleteComment.as_view(), name='delete'),
+    path('<int:pk>/replies/', CommentReplies.as_view(), name='replies'),
     path('<int:pk>/react/<str:reaction>/', SetReaction.as_view(), name='react'),
     path('<int:pk>/flag/', SetFlag.as_view(), name='flag'),
     path('<int:pk>/flag/state/change/', ChangeFlagState.as_view(), name='flag-change-state'),
@@ -1,13 +1,19 @@
 import random
 import string
+import time
+from collections import namedtuple
 from enum import IntEnum, unique
 import hashlib
+from threading import Lock
 
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core import signing
 from django.apps import apps
+from django.db import connections, models, router
 
 from comment.conf import settings
 from comment.messages import ErrorMessage
@@ -19,9 +25,40 @@ class CommentFailReason(IntEnum):
     EXISTS = 2
 
 
+def get_content_type(app_name, model_name):
+    """
+    Content types are looked up through the in-process cache of `ContentTypeManager`, hence the database is only
+    hit the first time a content type is requested.
+    """
+    return ContentType.objects.get_by_natural_key(app_name, model_name.lower())
+
+
+def _get_model_obj_cache_key(content_type, model_id):
+    return 'comment:object:{}:{}'.format(content_type.pk, model_id)
+
+
 def get_model_obj(app_name, model_name, model_id):
-    content_type = ContentType.objects.get(app_label=app_name, model=model_name.lower())
-    model_object = content_type.get_object_for_this_type(id=model_id)
+    """
+    Resolve the object comments are attached to in at most one query.
+
+    Raises `ContentType.DoesNotExist` when the model is not known and `ObjectDoesNotExist` when no object has this
+    id. Resolved objects are kept in the cache configured by `COMMENT_CACHE_ALIAS` for
+    `COMMENT_CONTENT_OBJECT_CACHE_TIMEOUT` seconds when the timeout is set.
+    """
+    content_type = get_content_type(app_name, model_name)
+    model_class = content_type.model_class()
+    if model_class is None:
+        raise ContentType.DoesNotExist
+    timeout = settings.COMMENT_CONTENT_OBJECT_CACHE_TIMEOUT
+    if not timeout:
+        return model_class._default_manager.get(pk=model_id)
+
+    cache = caches[settings.COMMENT_CACHE_ALIAS]
+    key = _get_model_obj_cache_key(content_type, model_id)
+    model_object = cache.get(key)
+    if model_object is None:
+        model_object = model_class._default_manager.get(pk=model_id)
+        cache.set(key, model_object, timeout)
     return model_object
 
 
@@ -36,20 +73,65 @@ def get_gravatar_img(email):
     return f'https://www.gravatar.com/avatar/{hashed_email}'
 
 
-def get_profile_content_type():
-    profile_app_name = getattr(settings, 'PROFILE_APP_NAME', None)
-    profile_model_name = getattr(settings, 'PROFILE_MODEL_NAME', None)
-    if not profile_app_name or not profile_model_name:
-        return None
+ProfileInfo = namedtuple('ProfileInfo', ['model', 'image_field', 'user_relation'])
+_profile_info = {}
+
+
+def _introspect_profile(app_name, model_name):
+    """
+    Find the image field of the profile model and the name of its one-to-one relation from the user model, the one
+    read by `get_profile_instance`.
+    """
+    if not app_name or not model_name:
+        return ProfileInfo(None, None, None)
     try:
-        content_type = ContentType.objects.get(
-            app_label=profile_app_name,
-            model=profile_model_name.lower()
-        )
-    except ContentType.DoesNotExist:
+        profile_model = apps.get_model(app_name, model_name)
+    except LookupError:
+        return ProfileInfo(None, None, None)
+    image_field = next((field.name for field in profile_model._meta.get_fields() if hasattr(field, 'upload_to')), None)
+    user_relation = None
+    for field in get_user_model()._meta.get_fields():
+        if (
+            field.one_to_one and field.auto_created and field.related_model is profile_model and
+            field.get_accessor_name() == model_name.lower()
+        ):
+            user_relation = field.get_accessor_name()
+    return ProfileInfo(profile_model, image_field, user_relation)
+
+
+def get_profile_info():
+    """The profile model is introspected once for the values of `PROFILE_APP_NAME` and `PROFILE_MODEL_NAME`"""
+    key = (settings.PROFILE_APP_NAME, settings.PROFILE_MODEL_NAME)
+    try:
+        return _profile_info[key]
+    except KeyError:
+        info = _profile_info[key] = _introspect_profile(*key)
+        return info
+
+
+def clear_profile_cache():
+    _profile_info.clear()
+
+
+def get_profile_content_type():
+    profile_model = get_profile_info().model
+    if not profile_model:
         return None
+    return ContentType.objects.get_for_model(profile_model)
+
 
-    return content_type
+def get_profile_image_field():
+    """Return the name of the image field of the profile model, `None` when there is no such field"""
+    return get_profile_info().image_field
+
+
+def get_user_related_lookups(prefix='user'):
+    """Lookups for `select_related` that load the user along with their profile"""
+    lookups = [prefix]
+    user_relation = get_profile_info().user_relation
+    if user_relation:
+        lookups.append('{}__{}'.format(prefix, user_relation))
+    return lookups
 
 
 def get_profile_instance(user):
@@ -63,24 +145,38 @@ def has_valid_profile():
     if getattr(settings, 'COMMENT_USE_GRAVATAR'):
         return True
 
-    content_type = get_profile_content_type()
-    if not content_type:
-        return False
-    profile_model = content_type.model_class()
-    fields = profile_model._meta.get_fields()
-    for field in fields:
-        if hasattr(field, "upload_to"):
-            return True
-    return False
+    return get_profile_image_field() is not None
+
+
+def should_exclude_flagged():
+    """Whether flagged comments are hidden from users who cannot moderate them"""
+    allowed_flags = getattr(settings, 'COMMENT_FLAGS_ALLOWED', 0)
+    show_flagged = getattr(settings, 'COMMENT_SHOW_FLAGGED', False)
+    return bool(allowed_flags) and not show_flagged
 
 
 def _is_moderation_enabled():
     return settings.COMMENT_FLAGS_ALLOWED or settings.COMMENT_ALLOW_BLOCKING_USERS
 
 
+def _get_comment_groups(user):
+    """
+    Return the names of the comment moderation groups of the user.
+    Both groups are fetched in one query and cached on the user object, which lives for the duration of the request,
+    the same way django caches the permissions of the user.
+    """
+    try:
+        return user._comment_groups_cache
+    except AttributeError:
+        user._comment_groups_cache = frozenset(
+            user.groups.filter(name__in=["comment_admin", "comment_moderator"]).values_list("name", flat=True)
+        )
+        return user._comment_groups_cache
+
+
 def is_comment_admin(user):
     if _is_moderation_enabled():
-        return user.groups.filter(name="comment_admin").exists() or (
+        return "comment_admin" in _get_comment_groups(user) or (
             user.has_perm("comment.delete_flagged_comment")
             and user.has_perm("comment.delete_comment")
         )
@@ -89,7 +185,7 @@ def is_comment_admin(user):
 
 def is_comment_moderator(user):
     if _is_moderation_enabled():
-        return user.groups.filter(name="comment_moderator").exists() or user.has_perm(
+        return "comment_moderator" in _get_comment_groups(user) or user.has_perm(
             "comment.delete_flagged_comment"
         )
     return False
@@ -134,6 +230,94 @@ def id_generator(prefix='', chars=string.ascii_lowercase, len_id=6, suffix=''):
     return prefix + ''.join(random.choice(chars) for _ in range(len_id)) + suffix
 
 
+_last_timestamp = 0
+_timestamp_lock = Lock()
+
+
+def _get_unique_timestamp():
+    """Return the current time in microseconds, never returning the same value twice within a process"""
+    global _last_timestamp
+    with _timestamp_lock:
+        _last_timestamp = max(time.time_ns() // 1000, _last_timestamp + 1)
+        return _last_timestamp
+
+
+def _encode_base36(number):
+    digits = string.digits + string.ascii_lowercase
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+    return encoded or '0'
+
+
+def time_ordered_id_generator(prefix='', len_id=6, suffix=''):
+    """
+    Generate an id made of the time of its generation followed by random characters.
+    The time part differs for each id generated by a process, the random part separates ids generated by different
+    processes at the same microsecond.
+    """
+    return id_generator(prefix=prefix + _encode_base36(_get_unique_timestamp()), len_id=len_id, suffix=suffix)
+
+
+def _can_update_returning(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def update_counters(instance, returning=None, **counters):
+    """
+    Add the given values to the counter fields of the model instance in a single statement and set the new values of
+    `returning` (defaults to the updated counters) on the instance.
+    The new values are returned by the UPDATE statement itself where the database supports `RETURNING`, otherwise
+    they are read back in a separate query.
+    """
+    model = instance.__class__
+    returning = returning or list(counters)
+    using = router.db_for_write(model, instance=instance)
+    connection = connections[using]
+    if _can_update_returning(connection):
+        opts = model._meta
+        qn = connection.ops.quote_name
+        columns = [qn(opts.get_field(name).column) for name in counters]
+        sql = 'UPDATE {table} SET {assignments} WHERE {pk} = %s RETURNING {returning}'.format(
+            table=qn(opts.db_table),
+            assignments=', '.join('{column} = {column} + %s'.format(column=column) for column in columns),
+            pk=qn(opts.pk.column),
+            returning=', '.join(qn(opts.get_field(name).column) for name in returning)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*counters.values(), instance.pk])
+            row = cursor.fetchone()
+    else:
+        qs = model._default_manager.using(using).filter(pk=instance.pk)
+        qs.update(**{name: models.F(name) + value for name, value in counters.items()})
+        row = qs.values_list(*returning).first()
+
+    if row:
+        for name, value in zip(returning, row):
+            setattr(instance, name, value)
+
+
+def set_user_state(obj, user, **state):
+    """Attach the state of the user on the object, e.g. whether they have flagged it, to the object"""
+    user_id, current_state = getattr(obj, '_user_state', (user.pk, {}))
+    if user_id != user.pk:
+        current_state = {}
+    obj._user_state = (user.pk, {**current_state, **state})
+
+
+def get_user_state(obj, user):
+    """Return the state of the user attached to the object or `None` when it has not been attached"""
+    user_id, state = getattr(obj, '_user_state', (None, None))
+    if user_id != user.pk:
+        return None
+    return state
+
+
 def get_comment_from_key(key):
     class TmpComment:
         is_valid = True
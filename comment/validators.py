@@ -1,13 +1,14 @@
 from abc import abstractmethod, ABCMeta
 
+from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import EmailValidator
 from django.http import JsonResponse
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
 from comment.exceptions import CommentBadRequest
 from comment.messages import ContentTypeError, ExceptionError, EmailError
-from comment.utils import get_request_data
+from comment.utils import get_content_type, get_model_obj, get_request_data
 
 
 class BaseValidatorMixin:
@@ -41,7 +42,9 @@ class ContentTypeValidator(BaseValidatorMixin):
             self.error = ContentTypeError.APP_NAME_MISSING
             raise CommentBadRequest(self.error)
 
-        if not ContentType.objects.filter(app_label=app_name).exists():
+        try:
+            apps.get_app_config(app_name)
+        except LookupError:
             self.error = ContentTypeError.APP_NAME_INVALID.format(app_name=app_name)
             raise CommentBadRequest(self.error)
         return app_name
@@ -54,7 +57,7 @@ class ContentTypeValidator(BaseValidatorMixin):
 
     def validate_content_type_object(self, app_name, model_name):
         try:
-            ct_object = ContentType.objects.get(model=model_name, app_label=app_name)
+            ct_object = get_content_type(app_name, model_name)
         except ContentType.DoesNotExist:
             self.error = ContentTypeError.MODEL_NAME_INVALID.format(model_name=model_name)
             raise CommentBadRequest(self.error)
@@ -72,13 +75,12 @@ class ContentTypeValidator(BaseValidatorMixin):
         return model_id
 
     def validate_model_object(self, app_name, model_name, model_id):
-        ct_object = self.validate_content_type_object(app_name, model_name)
-        model_class = ct_object.model_class()
-        model_query = model_class.objects.filter(id=model_id)
-        if not model_query.exists() and model_query.count() != 1:
+        self.validate_content_type_object(app_name, model_name)
+        try:
+            return get_model_obj(app_name, model_name, model_id)
+        except ObjectDoesNotExist:
             self.error = ContentTypeError.MODEL_ID_INVALID.format(model_id=model_id, model_name=model_name)
             raise CommentBadRequest(self.error)
-        return model_query.first()
 
     def validate(self, request):
         super().validate(request)
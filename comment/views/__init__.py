@@ -1,5 +1,5 @@
 from comment.views.base import BaseCommentView, CommentCreateMixin
-from comment.views.comments import CreateComment, UpdateComment, DeleteComment, ConfirmComment
+from comment.views.comments import CreateComment, UpdateComment, DeleteComment, CommentReplies, ConfirmComment
 from comment.views.reactions import SetReaction
 from comment.views.flags import SetFlag, ChangeFlagState
 from comment.views.followers import BaseToggleFollowView, ToggleFollowView
@@ -11,6 +11,7 @@ __all__ = (
     'CreateComment',
     'UpdateComment',
     'DeleteComment',
+    'CommentReplies',
     'ConfirmComment',
     'SetReaction',
     'SetFlag',
@@ -1,3 +1,6 @@
+from functools import partial
+
+from django.db import transaction
 from django.views.generic import FormView
 
 from comment.conf import settings
@@ -14,7 +17,8 @@ class BaseCommentView(FormView, DABResponseData):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = context.pop('form')
-        context.update(DABContext(self.request))
+        # the target object is already resolved by the validators of views using them
+        context.update(DABContext(self.request, model_object=getattr(self, 'model_obj', None)))
         return context
 
     def get_form_kwargs(self):
@@ -35,8 +39,14 @@ class CommentCreateMixin(BaseCommentView):
             self.email_service.send_notification_to_followers()
 
     def perform_save(self, comment, request):
-        comment.save()
-        self._send_notification_to_followers(comment, request)
+        with transaction.atomic():
+            comment.save()
+            if settings.COMMENT_EMAIL_USE_OUTBOX or settings.COMMENT_NOTIFICATION_DIGEST:
+                # the notification is stored along with the comment
+                self._send_notification_to_followers(comment, request)
+            else:
+                # notify about committed comments only, without keeping the transaction open while sending
+                transaction.on_commit(partial(self._send_notification_to_followers, comment, request))
         comment.refresh_from_db()
         return comment
 
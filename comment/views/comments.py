@@ -2,12 +2,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.contrib import messages
+from django.views import View
 
 from comment.models import Comment
 from comment.forms import CommentForm
-from comment.utils import get_comment_from_key, get_user_for_request, CommentFailReason
-from comment.mixins import CanCreateMixin, CanEditMixin, CanDeleteMixin
-from comment.responses import UTF8JsonResponse
+from comment.utils import get_comment_from_key, get_user_for_request, is_comment_moderator, CommentFailReason
+from comment.context import RepliesContext
+from comment.mixins import AJAXRequiredMixin, CanCreateMixin, CanEditMixin, CanDeleteMixin
+from comment.responses import UTF8JsonResponse, DABResponseData
 from comment.messages import EmailError
 from comment.views import CommentCreateMixin, BaseCommentView
 
@@ -101,6 +103,19 @@ class DeleteComment(CanDeleteMixin, BaseCommentView):
         return UTF8JsonResponse(self.json())
 
 
+class CommentReplies(AJAXRequiredMixin, View, DABResponseData):
+    """Render the replies of a parent comment, loaded on demand when `COMMENT_LAZY_LOAD_REPLIES` is enabled"""
+
+    def get(self, request, *args, **kwargs):
+        comment = get_object_or_404(
+            Comment.objects.filter_with_replies(include_flagged=is_comment_moderator(request.user)),
+            pk=kwargs.get('pk')
+        )
+        context = RepliesContext(request, comment, comment=comment)
+        self.data = render_to_string('comment/comments/replies.html', context, request=request)
+        return UTF8JsonResponse(self.json())
+
+
 class ConfirmComment(CommentCreateMixin):
 
     @staticmethod
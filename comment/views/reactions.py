@@ -26,7 +26,6 @@ class SetReaction(BaseCommentMixin, View, DABResponseData):
             self.status = 400
             return UTF8JsonResponse(self.json(), status=self.status)
 
-        comment.reaction.refresh_from_db()
         self.data = {
             'status': 0,
             'likes': comment.likes,
@@ -0,0 +1,41 @@
+"""
+Compare the cost of rendering a comment in markdown format with a new `Markdown` instance per comment to the reused
+renderer of the `render_content` template tag.
+
+    python -m test.benchmarks.render_markdown
+"""
+import os
+import sys
+import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test.settings.test')
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example'))
+django.setup()
+
+import markdown as md  # noqa: E402
+
+from comment.conf import settings  # noqa: E402
+from comment.templatetags.comment_tags import _render_markdown  # noqa: E402
+
+CONTENT = 'Some *comment* with `code` and a [link](https://example.com).'
+NUMBER = 2000
+
+
+def render_with_new_instance():
+    md.markdown(
+        CONTENT,
+        extensions=settings.COMMENT_MARKDOWN_EXTENSIONS,
+        extension_configs=settings.COMMENT_MARKDOWN_EXTENSION_CONFIG
+    )
+
+
+def render_with_reused_instance():
+    _render_markdown(CONTENT)
+
+
+if __name__ == '__main__':
+    for name, func in (('new instance', render_with_new_instance), ('reused instance', render_with_reused_instance)):
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print(f'{name}: {seconds / NUMBER * 1e6:.1f} us per comment')